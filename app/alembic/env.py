@@ -10,7 +10,12 @@ from alembic import context
 from app.core.base.base_model import Base
 from app.core.config import settings
 from app.core.models.model_user import User
-from app.core.models.model_task import Task, TaskPermission
+from app.core.models.model_task import (
+    Task,
+    TaskPermission,
+    TaskVersionShard,
+    TaskChange,
+)
 
 
 # this is the Alembic Config object, which provides
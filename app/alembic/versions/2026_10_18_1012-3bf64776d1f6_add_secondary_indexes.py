@@ -0,0 +1,68 @@
+"""Add secondary indexes for tasks and taskpermissions
+
+Revision ID: 3bf64776d1f6
+Revises: 6bc7d8db0639
+Create Date: 2026-10-18 10:12:41.218304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3bf64776d1f6"
+down_revision: Union[str, None] = "6bc7d8db0639"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в таблицы, но не может выполняться
+    # внутри транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_id_id",
+            "tasks",
+            ["user_id", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_tasks_date_from_date_to",
+            "tasks",
+            ["date_from", "date_to"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_taskpermissions_user_id_permission_task_id",
+            "taskpermissions",
+            ["user_id", "permission", "task_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_taskpermissions_user_id_permission_task_id",
+            table_name="taskpermissions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_tasks_date_from_date_to",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_tasks_user_id_id",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,37 @@
+"""Add users.tasks_version and taskversionshards
+
+Revision ID: bb26bb2d735d
+Revises: 3bf64776d1f6
+Create Date: 2026-10-18 14:20:09.513127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bb26bb2d735d"
+down_revision: Union[str, None] = "3bf64776d1f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("tasks_version", sa.BigInteger(), server_default="0", nullable=False),
+    )
+    op.create_table(
+        "taskversionshards",
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("taskversionshards")
+    op.drop_column("users", "tasks_version")
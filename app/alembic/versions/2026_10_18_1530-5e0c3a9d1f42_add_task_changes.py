@@ -0,0 +1,52 @@
+"""Add taskchanges change log
+
+Revision ID: 5e0c3a9d1f42
+Revises: bb26bb2d735d
+Create Date: 2026-10-18 15:30:41.208113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0c3a9d1f42"
+down_revision: Union[str, None] = "bb26bb2d735d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "taskchanges",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Начальное состояние журнала: каждая задача один раз для владельца
+    # и получателей права на чтение, чтобы синхронизация с since=0 отдала
+    # все задачи. Аудитория та же, что у записей при изменении задач.
+    op.execute(
+        """
+        INSERT INTO taskchanges (task_id, user_id)
+        SELECT task_id, user_id FROM (
+            SELECT id AS task_id, user_id FROM tasks
+            UNION
+            SELECT task_id, user_id FROM taskpermissions WHERE permission = 'READ'
+        ) AS audience
+        ORDER BY user_id, task_id
+        """
+    )
+    op.create_index(
+        "ix_taskchanges_user_id_id", "taskchanges", ["user_id", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_taskchanges_user_id_id", table_name="taskchanges")
+    op.drop_table("taskchanges")
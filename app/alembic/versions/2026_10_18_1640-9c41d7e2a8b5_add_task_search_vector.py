@@ -0,0 +1,58 @@
+"""Add tasks.search_vector with GIN index
+
+Revision ID: 9c41d7e2a8b5
+Revises: 5e0c3a9d1f42
+Create Date: 2026-10-18 16:40:12.771904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c41d7e2a8b5"
+down_revision: Union[str, None] = "5e0c3a9d1f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Добавление STORED-колонки переписывает таблицу tasks под эксклюзивной
+    # блокировкой, на больших таблицах миграцию нужно планировать в окно.
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('russian', name_task), 'A') || "
+                "setweight(to_tsvector('russian', description), 'B')",
+                persisted=True,
+            ),
+            nullable=False,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_search_vector",
+            "tasks",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_search_vector",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("tasks", "search_vector")
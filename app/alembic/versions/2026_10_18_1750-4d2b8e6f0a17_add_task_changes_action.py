@@ -0,0 +1,35 @@
+"""Add taskchanges.action
+
+Revision ID: 4d2b8e6f0a17
+Revises: 9c41d7e2a8b5
+Create Date: 2026-10-18 17:50:03.418275
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d2b8e6f0a17"
+down_revision: Union[str, None] = "9c41d7e2a8b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Постоянное значение по умолчанию не переписывает таблицу. Вид
+    # изменения у старых записей неизвестен, они помечаются как update.
+    op.add_column(
+        "taskchanges",
+        sa.Column(
+            "action", sa.String(length=16), nullable=False, server_default="update"
+        ),
+    )
+    op.alter_column("taskchanges", "action", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("taskchanges", "action")
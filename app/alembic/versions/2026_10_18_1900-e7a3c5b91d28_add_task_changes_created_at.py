@@ -0,0 +1,37 @@
+"""Add taskchanges.created_at
+
+Revision ID: e7a3c5b91d28
+Revises: 4d2b8e6f0a17
+Create Date: 2026-10-18 19:00:41.902316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3c5b91d28"
+down_revision: Union[str, None] = "4d2b8e6f0a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # now() вычисляется один раз, поэтому таблица не переписывается:
+    # старые записи получают время миграции и хранятся полный срок.
+    op.add_column(
+        "taskchanges",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("taskchanges", "created_at")
@@ -0,0 +1,32 @@
+"""Add users.changes_pruned_id
+
+Revision ID: a41f6c2e9b73
+Revises: e7a3c5b91d28
+Create Date: 2026-10-18 20:10:27.553810
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f6c2e9b73"
+down_revision: Union[str, None] = "e7a3c5b91d28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "changes_pruned_id", sa.BigInteger(), server_default="0", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "changes_pruned_id")
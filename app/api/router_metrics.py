@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Response
+
+from app.core.base.db_helper import db_helper
+from app.core.base.timing import TimedRoute
+from app.core.dependencies.metrics_depend import verify_metrics_access
+from app.core.schemas.schemas_metrics import (
+    CacheStatus,
+    PoolStatus,
+    PasswordHasherStatus,
+)
+from app.utils.cache import caches
+from app.utils.func_by_auth import password_hasher
+from app.utils.prometheus import render_metrics
+
+router = APIRouter(
+    tags=["Metrics"],
+    route_class=TimedRoute,
+    dependencies=[Depends(verify_metrics_access)],
+)
+
+
+@router.get("/db_pool_status")
+async def get_db_pool_status() -> PoolStatus:
+    """
+    Состояние пула соединений с БД: занятые и overflow-соединения,
+    число выдач соединений и время ожидания свободного соединения.
+    """
+    return db_helper.pool_status()
+
+
+@router.get("/password_hasher_status")
+async def get_password_hasher_status() -> PasswordHasherStatus:
+    """
+    Состояние пула bcrypt: занятые воркеры, глубина очереди и число
+    выполненных хеширований и проверок пароля.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/cache_status")
+async def get_cache_status() -> dict[str, CacheStatus]:
+    """Размер, попадания, промахи и вытеснения кешей в памяти процесса."""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Метрики в текстовом формате Prometheus."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
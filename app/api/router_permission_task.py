@@ -1,7 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies.auth_depend import get_current_user
-from app.core.dependencies.permission_depend import verify_task_owner
+from app.core.dependencies.db_depend import get_session
+from app.core.dependencies.permission_depend import (
+    verify_task_owner,
+    verify_tasks_owner,
+)
 from app.core.exceptions.errors_permission_task import (
     PermissionAlreadyExists,
     PermissionNotFound,
@@ -9,15 +14,20 @@ from app.core.exceptions.errors_permission_task import (
 from app.core.exceptions.errors_task import NotOwnerError, TaskNotFound
 from app.core.exceptions.general_errors import DataBaseError
 from app.core.models.model_task import PermissionType
-from app.core.schemas.schemas_permission import TaskPermissionResponse
+from app.core.schemas.schemas_permission import (
+    TaskPermissionBatch,
+    TaskPermissionResponse,
+)
 from app.core.schemas.schemas_user import UserRead
+from app.core.base.timing import TimedRoute
 from app.crud.crud_permission_task import (
     grand_permission,
+    grand_permissions,
     revoke_permission,
-    get_permission,
+    revoke_permissions,
 )
 
-router = APIRouter(tags=["Permission"])
+router = APIRouter(tags=["Permission"], route_class=TimedRoute)
 
 
 @router.post("/tasks/{task_id}/permissions")
@@ -26,18 +36,13 @@ async def add_permission(
     user_id: int,
     required_permission: PermissionType,
     current_user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> TaskPermissionResponse:
     try:
-        task = await verify_task_owner(task_id, current_user.id)
-        permission = await get_permission(
-            task_id, user_id, required_permission, current_user.id
-        )
-        if permission:
-            raise HTTPException(
-                status_code=404, detail="Права доступа уже выданы пользователю"
-            )
+        await verify_task_owner(session, task_id, current_user.id)
+        # Повторная выдача отсекается уникальным ограничением при вставке.
         new_permission = await grand_permission(
-            task_id, user_id, required_permission, current_user.id
+            session, task_id, user_id, required_permission, current_user.id
         )
         return new_permission
     except NotOwnerError:
@@ -60,11 +65,11 @@ async def remove_permission(
     user_id: int,
     required_permission: PermissionType,
     current_user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> TaskPermissionResponse:
     try:
-        task = await verify_task_owner(task_id, current_user.id)
         permission = await revoke_permission(
-            task_id, user_id, required_permission, current_user.id
+            session, task_id, user_id, required_permission, current_user.id
         )
         return permission
     except NotOwnerError:
@@ -81,3 +86,55 @@ async def remove_permission(
             detail=f"Разрешение для task_id {task_id}"
             f"и user_id {user_id} не найдено",
         )
+
+
+@router.post("/tasks/permissions/grant")
+async def add_permissions(
+    batch: TaskPermissionBatch,
+    current_user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[TaskPermissionResponse]:
+    """
+    Пакетная выдача разрешений.
+
+    Владение всеми задачами проверяется одним запросом, уже выданные
+    разрешения пропускаются. Возвращает только новые разрешения.
+    """
+    try:
+        await verify_tasks_owner(
+            session, {item.task_id for item in batch.items}, current_user.id
+        )
+        return await grand_permissions(session, batch.items)
+    except NotOwnerError:
+        raise HTTPException(
+            status_code=404, detail="Пользователь не являеться создателем задачи"
+        )
+    except TaskNotFound:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    except DataBaseError:
+        raise HTTPException(status_code=400, detail=f"Ошибка целостности данных.")
+
+
+@router.post("/tasks/permissions/revoke")
+async def remove_permissions(
+    batch: TaskPermissionBatch,
+    current_user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> list[TaskPermissionResponse]:
+    """
+    Пакетный отзыв разрешений.
+
+    Владение всеми задачами проверяется одним запросом. Возвращает только
+    действительно отозванные разрешения.
+    """
+    try:
+        await verify_tasks_owner(
+            session, {item.task_id for item in batch.items}, current_user.id
+        )
+        return await revoke_permissions(session, batch.items)
+    except NotOwnerError:
+        raise HTTPException(
+            status_code=404, detail="Пользователь не являеться создателем задачи"
+        )
+    except TaskNotFound:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
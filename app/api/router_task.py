@@ -1,54 +1,317 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+from typing import Any, AsyncIterator
 
-from app.core.exceptions.errors_task import TaskNotFound, NotOwnerError
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base.task_events import task_event_hub, sse_message
+from app.core.config import settings
+from app.core.exceptions.errors_task import (
+    ChangesCursorExpired,
+    TaskNotFound,
+    NotOwnerError,
+)
 from app.core.exceptions.general_errors import DataBaseError
 from app.core.models.model_task import PermissionType
-from app.core.schemas.schemas_task import TaskCreate, TaskRead
+from app.core.schemas.schemas_task import (
+    TaskCreate,
+    TaskRead,
+    TaskPage,
+    TaskFilter,
+    TaskBulkError,
+    TaskBulkCreateResult,
+    TaskChanges,
+)
 from app.core.schemas.schemas_user import UserRead
 from app.core.dependencies.auth_depend import get_current_user
+from app.core.dependencies.db_depend import get_session
 from app.crud.crud_task import (
     task_create,
+    tasks_bulk_create,
     get_tasks,
+    stream_tasks,
     update_task_with_permission_check,
     get_accessible_task,
+    get_task_changes,
+    search_tasks,
 )
-from app.crud.crud_task import get_task_by_id
 from app.crud.crud_task import delete_task_by_id
+from app.crud.crud_version import get_user_tasks_version, get_all_tasks_version
+from app.utils.etag import (
+    make_etag,
+    etag_matches,
+    etag_headers,
+    not_modified,
+    set_etag,
+)
+from app.utils.fast_json import FastJSONResponse, dumps
 from app.core.exceptions.errors_user import UserHasNoPermission
+from app.core.base.timing import TimedRoute
 
-router = APIRouter(tags=["Task"])
+router = APIRouter(tags=["Task"], route_class=TimedRoute)
 
 
 @router.post("/create_task")
 async def create_task(
-    task_in: TaskCreate, user: UserRead = Depends(get_current_user)
+    task_in: TaskCreate,
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> TaskRead:
     try:
-        new_task = await task_create(task_in, user)
+        new_task = await task_create(session, task_in, user)
         return new_task
     except DataBaseError:
         raise HTTPException(status_code=400, detail=f"Ошибка целостности базы данных.")
 
 
+async def iter_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Элементы тела запроса для пакетного создания задач.
+
+    application/x-ndjson читается потоково построчно, остальное разбирается
+    как JSON-массив.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=422, detail="Тело запроса не является JSON.")
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=422, detail="Ожидается JSON-массив задач или NDJSON."
+        )
+    for item in items:
+        yield item
+
+
+def validation_error_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+@router.post("/create_tasks")
+async def create_tasks(
+    request: Request,
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskBulkCreateResult:
+    """
+    Пакетное создание задач из JSON-массива или NDJSON-потока TaskCreate.
+
+    Валидные задачи вставляются пачками по TASKS_BULK_BATCH_SIZE
+    многострочным INSERT, невалидные попадают в errors с индексом элемента.
+    """
+    ids, errors, batch = [], [], []
+    try:
+        index = 0
+        async for item in iter_bulk_items(request):
+            try:
+                if isinstance(item, bytes):
+                    batch.append(TaskCreate.model_validate_json(item))
+                else:
+                    batch.append(TaskCreate.model_validate(item))
+            except ValidationError as error:
+                errors.append(
+                    TaskBulkError(index=index, detail=validation_error_detail(error))
+                )
+            index += 1
+            if len(batch) >= settings.TASKS_BULK_BATCH_SIZE:
+                ids.extend(await tasks_bulk_create(session, batch, user))
+                batch = []
+        ids.extend(await tasks_bulk_create(session, batch, user))
+    except DataBaseError:
+        raise HTTPException(status_code=400, detail=f"Ошибка целостности базы данных.")
+    return TaskBulkCreateResult(created=len(ids), ids=ids, errors=errors)
+
+
 @router.get("/get_me_tasks")
-async def get_me_task(user: UserRead = Depends(get_current_user)) -> list[TaskRead]:
-    tasks = await get_accessible_task(user.id, PermissionType.READ)
+async def get_me_task(
+    request: Request,
+    response: Response,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    filters: TaskFilter = Depends(),
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskPage:
+    """
+    Задачи пользователя и задачи, к которым у него есть право на чтение.
+
+    Поддерживает keyset-пагинацию по id и фильтры по датам и префиксу названия.
+    Отдает ETag по версии задач пользователя, на совпадающий If-None-Match
+    отвечает 304 без выборки задач. С TASKS_FAST_JSON строки сериализуются
+    напрямую, без повторной валидации через TaskRead.
+    """
+    # Версия читается до данных: при гонке ETag лишь устареет, но не соврет.
+    version = await get_user_tasks_version(session, user.id)
+    etag = make_etag(request, f"u{user.id}", version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    tasks = await get_accessible_task(
+        session, user.id, PermissionType.READ, after_id, limit, filters
+    )
+    if settings.TASKS_FAST_JSON:
+        return FastJSONResponse(tasks, headers=etag_headers(etag))
+    set_etag(response, etag)
     return tasks
 
 
+@router.get("/tasks/search")
+async def search_task(
+    q: str = Query(min_length=1, max_length=200),
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskPage:
+    """
+    Поиск по названию и описанию задач, доступных пользователю на чтение.
+
+    Результаты ранжированы по релевантности, следующая страница
+    запрашивается с cursor=next_cursor.
+    """
+    tasks = await search_tasks(session, user.id, q, cursor, limit)
+    return tasks
+
+
+@router.get("/tasks/changes")
+async def get_tasks_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> TaskChanges:
+    """
+    Изменения доступных пользователю задач после курсора since.
+
+    Возвращает измененные и созданные задачи целиком и id задач, которые
+    удалены или перестали быть доступны. Следующий запрос делается с
+    since=cursor, пока has_more истинно. since=0 отдает все задачи.
+    Ответ 410 означает, что журнал после since уже очищен и задачи нужно
+    загрузить заново с since=0.
+    """
+    try:
+        changes = await get_task_changes(session, user.id, since, limit)
+    except ChangesCursorExpired:
+        raise HTTPException(
+            status_code=410,
+            detail="Курсор синхронизации устарел, загрузите задачи с since=0",
+        )
+    return changes
+
+
+async def task_events_stream(user_id: int) -> AsyncIterator[bytes]:
+    with task_event_hub.subscribe(user_id) as queue:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), settings.TASK_EVENTS_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield sse_message(event)
+
+
+@router.get("/tasks/events")
+async def get_tasks_events(
+    user: UserRead = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Server-Sent Events об изменениях задач, видимых пользователю.
+
+    Авторизация по cookie access_token. Событие содержит action (create,
+    update, delete, grant, revoke), task_id и cursor; сами задачи клиент
+    забирает через /tasks/changes. При переподключении Last-Event-ID
+    подходит как since, а событие resync означает, что нужно догнать
+    изменения от последнего курсора. Сессия БД на время стрима не держится.
+    """
+    return StreamingResponse(
+        task_events_stream(user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def tasks_to_ndjson(after_id: int) -> AsyncIterator[bytes]:
+    """
+    NDJSON-строки задач, собранные в части по TASKS_STREAM_BATCH_SIZE строк.
+
+    Одна часть - одно сообщение ASGI и, при сжатии, один flush компрессора,
+    поэтому построчная отправка не раздувает ни накладные расходы, ни ответ.
+    """
+    lines = []
+    async for task in stream_tasks(after_id):
+        if settings.TASKS_FAST_JSON:
+            lines.append(dumps(task))
+        else:
+            lines.append(TaskRead.model_validate(task).model_dump_json().encode())
+        if len(lines) >= settings.TASKS_STREAM_BATCH_SIZE:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
 @router.get("/get_all_task")
-async def get_all_task() -> list[TaskRead]:
-    tasks = await get_tasks()
+async def get_all_task(
+    request: Request,
+    response: Response,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(settings.TASKS_PAGE_SIZE, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    stream: bool = False,
+    session: AsyncSession = Depends(get_session),
+) -> TaskPage:
+    """
+    Список задач с keyset-пагинацией по id.
+
+    В режиме stream=true все задачи после after_id отдаются построчно в формате
+    NDJSON без загрузки всей выборки в память, limit при этом не применяется.
+    Страницы отдаются с ETag по общей версии задач. С TASKS_FAST_JSON
+    строки сериализуются напрямую, без повторной валидации через TaskRead.
+    """
+    if stream:
+        return StreamingResponse(
+            tasks_to_ndjson(after_id), media_type="application/x-ndjson"
+        )
+    version = await get_all_tasks_version(session)
+    etag = make_etag(request, "all", version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    tasks = await get_tasks(session, after_id, limit)
+    if settings.TASKS_FAST_JSON:
+        return FastJSONResponse(tasks, headers=etag_headers(etag))
+    set_etag(response, etag)
     return tasks
 
 
 @router.patch("/update_task{task_id}")
 async def update_task(
-    task_id: int, task_in: TaskCreate, user: UserRead = Depends(get_current_user)
+    task_id: int,
+    task_in: TaskCreate,
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> TaskRead:
     try:
-        task = await get_task_by_id(task_id)
-        up_task = await update_task_with_permission_check(user.id, task_id, task_in)
+        up_task = await update_task_with_permission_check(
+            session, user.id, task_id, task_in
+        )
         return up_task
     except UserHasNoPermission:
         raise HTTPException(
@@ -62,9 +325,13 @@ async def update_task(
 
 
 @router.delete("/delete_task{task_id}")
-async def delete_task(task_id: int, user: UserRead = Depends(get_current_user)) -> dict:
+async def delete_task(
+    task_id: int,
+    user: UserRead = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> dict:
     try:
-        task = await delete_task_by_id(task_id, user.id)
+        task = await delete_task_by_id(session, task_id, user.id)
         return {"condition": True}
     except TaskNotFound:
         raise HTTPException(
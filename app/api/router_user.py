@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Response, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies.auth_depend import authenticate_user
+from app.core.dependencies.db_depend import get_session
 from app.core.exceptions.errors_user import (
     UserAlreadyExists,
     UserNotFound,
@@ -8,22 +10,27 @@ from app.core.exceptions.errors_user import (
 )
 from app.crud.crud_user import create_user, get_user_by_email
 from app.core.schemas.schemas_user import UserCreate, UserRead
-from app.utils.func_by_auth import create_access_token
+from app.utils.func_by_auth import create_access_token, password_hasher
 from app.core.exceptions.general_errors import DataBaseError
+from app.core.base.timing import TimedRoute
 
-router = APIRouter(tags=["Auth & User"])
+router = APIRouter(tags=["Auth & User"], route_class=TimedRoute)
 
 
 @router.post("/register")
-async def register_user(user_reg: UserCreate) -> UserRead:
+async def register_user(
+    user_reg: UserCreate, session: AsyncSession = Depends(get_session)
+) -> UserRead:
+    # Хеш считается до первого запроса, пока соединение не взято из пула.
+    hash_password = await password_hasher.hash(user_reg.hash_password)
     try:
-        user = await get_user_by_email(user_reg.email)
+        user = await get_user_by_email(session, user_reg.email)
         if user:
             raise HTTPException(
                 status_code=400,
                 detail="Пользователь с таким адресом электронной почты уже существует",
             )
-        new_user = await create_user(user_reg)
+        new_user = await create_user(session, user_reg.email, hash_password)
         return new_user
     except UserAlreadyExists:
         raise HTTPException(
@@ -35,10 +42,13 @@ async def register_user(user_reg: UserCreate) -> UserRead:
 
 
 @router.post("/login")
-async def login_user(response: Response, user_data: UserCreate) -> dict:
+async def login_user(
+    response: Response,
+    user_data: UserCreate,
+) -> dict:
     try:
         user = await authenticate_user(user_data.email, user_data.hash_password)
-        access_token = create_access_token({"sub": str(user.id)})
+        access_token = create_access_token({"sub": str(user.id), "email": user.email})
         response.set_cookie("access_token", access_token, httponly=True)
         return {"access_token": "Пользователь аутентифицирован"}
     except UserNotFound:
@@ -1,21 +1,116 @@
-from sqlalchemy import NullPool
+import time
+from typing import Callable
+
+from sqlalchemy import NullPool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.core.config import settings
 
 
+class PoolWaitStats:
+    """
+    Счетчики ожидания свободного соединения в пуле.
+
+    listeners получают каждое ожидание (секунды, истек ли pool_timeout),
+    например для экспорта в Prometheus.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.listeners: list[Callable[[float, bool], None]] = []
+
+    def observe(self, wait: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        for listener in self.listeners:
+            listener(wait, timed_out)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который замеряет время ожидания соединения.
+
+    В замер попадает и ожидание, когда все pool_size + max_overflow
+    соединений заняты, и установка нового соединения.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.observe(time.perf_counter() - start, timed_out)
+
+
 class DataBaseHelper:
-    def __init__(self, url: str):
-        self.engine = create_async_engine(url=url)
-        self.session_factory = async_sessionmaker(bind=self.engine)
+    def __init__(self, url: str, **engine_params):
+        self.engine = create_async_engine(url=url, **engine_params)
+        self.session_factory = async_sessionmaker(
+            bind=self.engine, expire_on_commit=False
+        )
+
+    def pool_status(self) -> dict:
+        """
+        Текущее состояние пула соединений.
+
+        Для NullPool (режим TEST) доступен только класс пула.
+        """
+        pool = self.engine.pool
+        status = {"pool_class": type(pool).__name__}
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            status.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(pool.overflow(), 0),
+            )
+        stats = getattr(pool, "wait_stats", None)
+        if stats is not None:
+            status.update(
+                checkouts=stats.checkouts,
+                timeouts=stats.timeouts,
+                wait_avg_ms=(
+                    stats.wait_total / stats.checkouts * 1000 if stats.checkouts else 0
+                ),
+                wait_max_ms=stats.wait_max * 1000,
+            )
+        return status
 
     async def dispose(self):
         await self.engine.dispose()
 
 
+CONNECT_ARGS = {
+    "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    "server_settings": settings.DB_SERVER_SETTINGS,
+}
+
 if settings.MODE == "TEST":
-    DATABASE_PARAMS = {"poolclass": NullPool}
-    db_helper = DataBaseHelper(url=str(settings.TEST_DB_URL))
+    DATABASE_PARAMS = {"poolclass": NullPool, "connect_args": CONNECT_ARGS}
+    db_helper = DataBaseHelper(url=str(settings.TEST_DB_URL), **DATABASE_PARAMS)
 else:
-    DATABASE_PARAMS = {}
-    db_helper = DataBaseHelper(url=str(settings.DB_URL))
+    DATABASE_PARAMS = {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": CONNECT_ARGS,
+    }
+    db_helper = DataBaseHelper(url=str(settings.DB_URL), **DATABASE_PARAMS)
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Callable, Iterable
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.base.db_helper import db_helper
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Максимальный размер payload у NOTIFY - 8000 байт, id режутся на пачки
+# с запасом под остальные поля сообщения.
+NOTIFY_IDS_SIZE = 7000
+# Список выборки SELECT ограничен 1664 столбцами, pg_notify отправляются
+# пачками не больше NOTIFY_BATCH_SIZE вызовов на запрос.
+NOTIFY_BATCH_SIZE = 1000
+
+
+class InvalidationBus:
+    """
+    Шина сброса кешей в памяти процесса между воркерами.
+
+    CRUD-функции публикуют события (kind, ids) в рамках транзакции запроса.
+    После коммита событие применяется в текущем процессе, а с бэкендом
+    postgres еще и рассылается остальным воркерам через NOTIFY: события
+    транзакции уходят пачками SELECT pg_notify перед коммитом и доставляются
+    только если транзакция зафиксирована. Каждый воркер держит одно
+    соединение с LISTEN и применяет чужие события к своим кешам.
+    Этим же путем воркеры получают события задач для SSE-подписчиков.
+    """
+
+    def __init__(self, backend: str, channel: str):
+        self.backend = backend
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.handlers: dict[str, list[Callable[[list], None]]] = {}
+        self.connection: asyncpg.Connection | None = None
+        self.reconnect_task: asyncio.Task | None = None
+        self.received = 0
+
+    def register(self, kind: str, handler: Callable[[list], None]):
+        self.handlers.setdefault(kind, []).append(handler)
+
+    def apply(self, kind: str, ids: list):
+        for handler in self.handlers.get(kind, []):
+            handler(ids)
+
+    def publish(
+        self, session: AsyncSession, kind: str, ids: Iterable, early: bool = True
+    ):
+        """
+        Планирует событие: локально после коммита, другим воркерам - при коммите.
+
+        С early=True событие применяется еще и сразу, чтобы сама транзакция
+        не прочитала устаревший кеш. События для клиентов публикуются
+        с early=False и уходят только после коммита.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        if early:
+            self.apply(kind, ids)
+        pending = session.sync_session.info.setdefault("invalidations", [])
+        pending.append((kind, ids))
+
+    def payload(self, kind: str, ids: list) -> str:
+        return json.dumps({"origin": self.origin, "kind": kind, "ids": ids})
+
+    def payloads(self, events: list[tuple[str, list]]) -> list[str]:
+        payloads = []
+        for kind, ids in events:
+            chunk, size = [], 0
+            for item in ids:
+                item_size = len(json.dumps(item)) + 2
+                if chunk and size + item_size > NOTIFY_IDS_SIZE:
+                    payloads.append(self.payload(kind, chunk))
+                    chunk, size = [], 0
+                chunk.append(item)
+                size += item_size
+            if chunk:
+                payloads.append(self.payload(kind, chunk))
+        return payloads
+
+    def on_notification(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        if message["origin"] == self.origin:
+            return
+        self.received += 1
+        self.apply(message["kind"], message["ids"])
+
+    def on_termination(self, connection):
+        self.connection = None
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = asyncio.create_task(self.connect())
+
+    async def connect(self, attempts: int | None = None):
+        """
+        Открывает отдельное от пула соединение с LISTEN.
+
+        События, пришедшие пока соединения не было, потеряны, поэтому после
+        переподключения все кеши сбрасываются целиком. Без attempts попытки
+        идут бесконечно (переподключение во время работы), иначе после
+        attempts неудач выбрасывается последняя ошибка.
+        """
+        url = db_helper.engine.url.set(drivername="postgresql")
+        dsn = url.render_as_string(hide_password=False)
+        delay = 0.5
+        attempt = 0
+        while self.connection is None:
+            attempt += 1
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.channel, self.on_notification)
+                connection.add_termination_listener(self.on_termination)
+                self.connection = connection
+            except (OSError, asyncpg.PostgresError):
+                if attempts is not None and attempt >= attempts:
+                    logger.error(
+                        "Cache invalidation listener failed to connect "
+                        "to %s after %d attempts",
+                        url,
+                        attempt,
+                    )
+                    raise
+                logger.exception("Cache invalidation listener connection failed")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        self.apply("all", [])
+
+    async def start(self):
+        """
+        Подключает LISTEN при старте воркера.
+
+        Если за CACHE_INVALIDATION_CONNECT_ATTEMPTS попыток подключиться
+        не удалось, ошибка выбрасывается и воркер не стартует.
+        """
+        if self.backend == "postgres":
+            await self.connect(settings.CACHE_INVALIDATION_CONNECT_ATTEMPTS)
+
+    async def stop(self):
+        if self.reconnect_task is not None:
+            self.reconnect_task.cancel()
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.remove_termination_listener(self.on_termination)
+            await connection.close()
+
+
+invalidation_bus = InvalidationBus(
+    settings.CACHE_INVALIDATION_BACKEND, settings.CACHE_INVALIDATION_CHANNEL
+)
+
+
+@event.listens_for(Session, "before_commit")
+def notify_invalidations(session: Session):
+    events = session.info.get("invalidations")
+    if events and invalidation_bus.backend == "postgres":
+        payloads = invalidation_bus.payloads(events)
+        for start in range(0, len(payloads), NOTIFY_BATCH_SIZE):
+            batch = payloads[start : start + NOTIFY_BATCH_SIZE]
+            session.execute(
+                select(*[func.pg_notify(invalidation_bus.channel, p) for p in batch])
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def apply_invalidations(session: Session):
+    for kind, ids in session.info.pop("invalidations", []):
+        invalidation_bus.apply(kind, ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_invalidations(session: Session):
+    session.info.pop("invalidations", None)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.core.base.invalidation import invalidation_bus
+from app.core.config import settings
+
+# Событие, после которого клиент должен догнать изменения через
+# /tasks/changes: очередь подписчика переполнилась или события были потеряны.
+RESYNC = {"action": "resync"}
+
+
+class TaskEventHub:
+    """
+    Рассылка событий задач открытым SSE-подключениям процесса.
+
+    События приходят из шины инвалидации после коммита, поэтому на воркер
+    нужна одна подписка LISTEN, а не одна на подключение. Каждому
+    подключению событие кладется в его очередь только если оно адресовано
+    его пользователю, стоимость доставки не зависит от числа подключений
+    других пользователей.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers: dict[int, set[asyncio.Queue]] = {}
+        self.delivered = 0
+        self.overflows = 0
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[asyncio.Queue]:
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self.subscribers[user_id]
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+    def put(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            # Медленный клиент: вместо накопленных событий он получит resync.
+            self.overflows += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    def dispatch(self, changes: list):
+        """Раскладывает события (user_id, task_id, cursor, action) по очередям."""
+        for user_id, task_id, cursor, action in changes:
+            for queue in self.subscribers.get(user_id, ()):
+                self.put(
+                    queue, {"action": action, "task_id": task_id, "cursor": cursor}
+                )
+
+    def resync_all(self, ids: list):
+        for queues in self.subscribers.values():
+            for queue in queues:
+                self.put(queue, RESYNC)
+
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self.subscribers.values())
+
+
+def sse_message(event: dict) -> bytes:
+    """Событие в формате text/event-stream, id - курсор для /tasks/changes."""
+    lines = [f"event: {event['action']}"]
+    if "cursor" in event:
+        lines.append(f"id: {event['cursor']}")
+    lines.append(f"data: {json.dumps(event)}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+task_event_hub = TaskEventHub(settings.TASK_EVENTS_QUEUE_SIZE)
+invalidation_bus.register("task_change", task_event_hub.dispatch)
+invalidation_bus.register("all", task_event_hub.resync_all)
@@ -0,0 +1,217 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class RequestTiming:
+    """
+    Разбивка времени одного запроса по фазам.
+
+    Фазы (jwt, user, render) считаются без времени SQL-запросов внутри
+    них: запросы идут в отдельную фазу db вместе с их числом. Остаток
+    от общего времени - код обработчика (app).
+    Тексты запросов считаются, чтобы находить повторы одного и того же
+    запроса (признак N+1), а round_trips добавляет к запросам BEGIN и
+    COMMIT/ROLLBACK транзакций, в которых были запросы.
+    """
+
+    __slots__ = (
+        "start",
+        "phases",
+        "current",
+        "current_start",
+        "current_db",
+        "db_time",
+        "db_statements",
+        "round_trips",
+        "statements",
+        "route",
+        "response_start",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.current: str | None = None
+        self.current_start = 0.0
+        self.current_db = 0.0
+        self.db_time = 0.0
+        self.db_statements = 0
+        self.round_trips = 0
+        self.statements: dict[str, int] = {}
+        self.route: str | None = None
+        self.response_start: float | None = None
+
+    def enter(self, name: str):
+        self.exit()
+        self.current = name
+        self.current_start = time.perf_counter()
+        self.current_db = self.db_time
+
+    def exit(self):
+        if self.current is None:
+            return
+        elapsed = time.perf_counter() - self.current_start
+        elapsed -= self.db_time - self.current_db
+        self.phases[self.current] = self.phases.get(self.current, 0.0) + elapsed
+        self.current = None
+
+    def started(self):
+        """Отметка отправки заголовков ответа: закрывает фазу render."""
+        self.exit()
+        self.response_start = time.perf_counter()
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Запросы, выполненные не меньше threshold раз за запрос."""
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= threshold
+        }
+
+    def breakdown(self, end: float) -> dict[str, float]:
+        """Длительности фаз в миллисекундах до момента end."""
+        total = end - self.start
+        result = {name: seconds * 1000 for name, seconds in self.phases.items()}
+        result["db"] = self.db_time * 1000
+        result["app"] = max(total - sum(self.phases.values()) - self.db_time, 0) * 1000
+        result["total"] = total * 1000
+        return result
+
+    def header(self) -> str:
+        """Значение заголовка Server-Timing на момент отправки заголовков."""
+        parts = []
+        for name, ms in self.breakdown(
+            self.response_start or time.perf_counter()
+        ).items():
+            if name == "db":
+                parts.append(f'db;dur={ms:.2f};desc="{self.db_statements} queries"')
+            else:
+                parts.append(f"{name};dur={ms:.2f}")
+        return ", ".join(parts)
+
+
+request_timing: ContextVar[RequestTiming | None] = ContextVar(
+    "request_timing", default=None
+)
+
+
+@contextmanager
+def measure(name: str):
+    """Замер фазы текущего запроса; вне запроса ничего не делает."""
+    timing = request_timing.get()
+    if timing is None:
+        yield
+        return
+    timing.enter(name)
+    try:
+        yield
+    finally:
+        timing.exit()
+
+
+# Наблюдатели завершенных запросов, например проверка бюджета SQL в тестах.
+timing_listeners: list[Callable[[RequestTiming], None]] = []
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_timing.get() is not None:
+        conn.info["timing_start"] = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = request_timing.get()
+    start = conn.info.pop("timing_start", None)
+    if timing is not None and start is not None:
+        timing.db_time += time.perf_counter() - start
+        timing.db_statements += 1
+        timing.statements[statement] = timing.statements.get(statement, 0) + 1
+        if not conn.info.get("timing_in_transaction"):
+            # asyncpg открывает транзакцию (BEGIN) перед первым запросом.
+            conn.info["timing_in_transaction"] = True
+            timing.round_trips += 1
+        timing.round_trips += 1
+
+
+def end_transaction(conn):
+    if conn.info.pop("timing_in_transaction", False):
+        timing = request_timing.get()
+        if timing is not None:
+            timing.round_trips += 1
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Подключает замер SQL-запросов к движку (один раз на движок)."""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(sync_engine, "commit", end_transaction)
+        event.listen(sync_engine, "rollback", end_transaction)
+
+
+def timed_endpoint(endpoint):
+    """
+    Обертка эндпоинта, открывающая фазу render после его возврата.
+
+    В render попадают валидация response_model, сериализация в JSON и
+    завершение транзакции сессии - все, что FastAPI делает до отправки
+    заголовков ответа.
+    """
+    if getattr(endpoint, "__timed__", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            timing = request_timing.get()
+            if timing is not None:
+                timing.enter("render")
+            return result
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            timing = request_timing.get()
+            if timing is not None:
+                timing.enter("render")
+            return result
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Маршрут, который сообщает замеру шаблон пути и конец эндпоинта.
+
+    Шаблон пути также записывается в scope["route_path"] для метрик.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request):
+            # Шаблон пути виден внешним middleware через общий scope.
+            request.scope["route_path"] = path
+            timing = request_timing.get()
+            if timing is not None:
+                timing.route = path
+            return await handler(request)
+
+        return timed_handler
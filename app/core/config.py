@@ -21,6 +21,58 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_SERVER_SETTINGS: dict[str, str] = {}
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60
+    AUTH_TRUST_JWT_CLAIMS: bool = False
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: float = 300
+    ACL_CACHE_SIZE: int = 10000
+    ACL_CACHE_TTL: float = 60
+    ACL_USER_MAX_ENTRIES: int = 50000
+    CACHE_INVALIDATION_BACKEND: Literal["local", "postgres"] = "local"
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    CACHE_INVALIDATION_CONNECT_ATTEMPTS: int = 5
+
+    TASK_VERSION_SHARDS: int = 16
+    TASK_EVENTS_QUEUE_SIZE: int = 100
+    TASK_EVENTS_KEEPALIVE: float = 15
+    TASK_CHANGES_RETENTION_DAYS: float = 30
+    TASK_CHANGES_PRUNE_INTERVAL: float = 3600
+
+    COMPRESSION_ENCODINGS: list[Literal["br", "gzip"]] = ["br", "gzip"]
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    SERVER_TIMING_HEADER: bool = True
+    SERVER_TIMING_LOG: bool = True
+    SQL_REPEAT_THRESHOLD: int = 3
+    METRICS_ENABLED: bool = True
+    METRICS_SYNC_INTERVAL: float = 1
+    METRICS_TOKEN: str = ""
+    PROFILE_TOKEN: str = ""
+    PROFILE_SAMPLE_RATE: float = 0
+    PROFILE_INTERVAL: float = 0.005
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 100
+
+    TASKS_PAGE_SIZE: int = 100
+    TASKS_MAX_PAGE_SIZE: int = 1000
+    TASKS_STREAM_BATCH_SIZE: int = 1000
+    TASKS_FAST_JSON: bool = False
+    TASKS_BULK_BATCH_SIZE: int = 1000
+
     model_config = SettingsConfigDict(env_file="../.env")
 
 
@@ -1,15 +1,20 @@
 from fastapi import HTTPException, Depends, Request
-from jose import jwt, ExpiredSignatureError, JWTError
+from jose import ExpiredSignatureError, JWTError
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.base.db_helper import db_helper as db
+from app.core.base.timing import measure
 from app.core.config import settings
+from app.core.dependencies.db_depend import get_session
 from app.core.exceptions.errors_user import (
     UserNotFound,
     InvalidPasswordError,
     TokenNotFound,
 )
-from app.crud.crud_user import get_user_by_id, get_user_by_email
-from app.utils.func_by_auth import verify_password
+from app.core.schemas.schemas_user import UserRead
+from app.crud.crud_user import get_cached_user, get_user_by_email
+from app.utils.func_by_auth import decode_access_token, password_hasher
 
 
 async def authenticate_user(email: EmailStr, password: str):
@@ -17,12 +22,15 @@ async def authenticate_user(email: EmailStr, password: str):
     Аутентификация пользователя.
 
     Проверяет наличие пользователя с указанным email и соответствие пароля.
+    Пользователь ищется в отдельной короткой сессии: соединение возвращается
+    в пул до проверки пароля bcrypt.
     """
-    user = await get_user_by_email(email)
+    async with db.session_factory() as session:
+        user = await get_user_by_email(session, email)
     if not user:
         raise UserNotFound(f"Пользователь с email: {email} не найден")
     else:
-        if not verify_password(password, user.hash_password):
+        if not await password_hasher.verify(password, user.hash_password):
             raise InvalidPasswordError("Пароль не верный.")
     return user
 
@@ -37,22 +45,30 @@ def get_token(request: Request):
     return token
 
 
-async def get_current_user(token: str = Depends(get_token)):
+async def get_current_user(
+    token: str = Depends(get_token), session: AsyncSession = Depends(get_session)
+):
     """
     Получает текущего пользователя по JWT-токену.
 
     Декодирует токен, проверяет его валидность и извлекает ID пользователя.
     Если токен недействителен или пользователь не найден, выбрасывает HTTPException.
+    Пользователь берется из кеша, а при AUTH_TRUST_JWT_CLAIMS - прямо из
+    подписанных claims токена без обращения к БД.
     """
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+        with measure("jwt"):
+            payload = decode_access_token(token)
     except TokenNotFound:
         raise HTTPException(status_code=404, detail="Токен пользователя не найден")
     except ExpiredSignatureError:
         raise HTTPException(status_code=500, detail="Срок действия токена истек.")
     except JWTError:
         raise HTTPException(status_code=401, detail="Произошла непредвиденная ошибка.")
-    user = await get_user_by_id(user_id=int(payload.get("sub")))
+    if settings.AUTH_TRUST_JWT_CLAIMS and payload.get("email"):
+        return UserRead(id=int(payload["sub"]), email=payload["email"])
+    with measure("user"):
+        user = await get_cached_user(session, user_id=int(payload.get("sub")))
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден.")
 
@@ -0,0 +1,18 @@
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base.db_helper import db_helper as db
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия БД на время запроса.
+
+    Все CRUD-функции запроса работают в одной сессии и одной транзакции:
+    соединение берется из пула один раз, транзакция фиксируется после
+    успешного ответа и откатывается при любом исключении.
+    """
+    async with db.session_factory() as session:
+        async with session.begin():
+            yield session
@@ -0,0 +1,28 @@
+import hmac
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+
+def verify_metrics_access(request: Request):
+    """
+    Проверка доступа к метрикам и состоянию процесса.
+
+    Если задан METRICS_TOKEN, нужен заголовок Authorization: Bearer <token>
+    (bearer_token в scrape_config Prometheus). Без токена эндпоинты открыты
+    только вне MODE=PROD, в проде они отвечают 404.
+    """
+    if not settings.METRICS_TOKEN:
+        if settings.MODE == "PROD":
+            raise HTTPException(status_code=404, detail="Not Found")
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Неверный токен доступа к метрикам",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -1,31 +1,56 @@
-from fastapi import Depends
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.base.db_helper import db_helper as db
-from app.core.dependencies.auth_depend import get_current_user
 from app.core.exceptions.errors_task import TaskNotFound, NotOwnerError
 from app.core.models.model_task import Task
+from app.crud.crud_acl import Access, has_access
 from app.core.exceptions.general_errors import DataBaseError
 
 
-async def verify_task_owner(
-    task_id: int, current_user_id: int = Depends(get_current_user)
-):
+async def verify_task_owner(session: AsyncSession, task_id: int, current_user_id: int):
     """
     Проверяет, является ли текущий пользователь владельцем задачи.
 
     Получает задачу по ID и проверяет, совпадает ли ID владельца задачи с ID текущего пользователя.
-    Если задача не найдена или пользователь не является владельцем, выбрасывает HTTPException.
+    Если задача не найдена или пользователь не является владельцем, выбрасывает
+    TaskNotFound или NotOwnerError.
+    Владение сначала проверяется по кешу прав, задача загружается только при отказе.
+    """
+    if await has_access(session, current_user_id, task_id, Access.OWNER):
+        return
+    try:
+        task = await session.get(Task, task_id)
+        if not task:
+            raise TaskNotFound(f"Task with id {task_id} not found")
+        if task.user_id != current_user_id:
+            raise NotOwnerError(
+                f"User with id {current_user_id} is not authorized to modify this task"
+            )
+    except IntegrityError:
+        raise DataBaseError(f"Ошибка базы данных")
+
+
+async def verify_tasks_owner(
+    session: AsyncSession, task_ids: set[int], current_user_id: int
+):
+    """
+    Проверяет одним запросом, что пользователь владеет всеми задачами task_ids.
+
+    Выбрасывает TaskNotFound, если какой-то задачи нет, и NotOwnerError,
+    если какая-то задача принадлежит другому пользователю.
     """
-    async with db.session_factory() as session:
-        try:
-            task = await session.get(Task, task_id)
-            if not task:
-                raise TaskNotFound(f"Task with id {task_id} not found")
-            if task.user_id != current_user_id:
-                raise NotOwnerError(
-                    f"User with id {current_user_id} is not authorized to modify this task"
-                )
-        except IntegrityError:
-            await session.rollback()
-            raise DataBaseError(f"Ошибка базы данных")
+    result = await session.execute(
+        select(Task.id, Task.user_id).where(Task.id.in_(task_ids))
+    )
+    owners = dict(result.tuples().all())
+    missing = task_ids - owners.keys()
+    if missing:
+        raise TaskNotFound(f"Tasks with ids {sorted(missing)} not found")
+    foreign = sorted(
+        task_id for task_id, owner in owners.items() if owner != current_user_id
+    )
+    if foreign:
+        raise NotOwnerError(
+            f"User with id {current_user_id} is not authorized to modify tasks {foreign}"
+        )
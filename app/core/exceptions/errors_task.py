@@ -16,3 +16,9 @@ class NotOwnerError(TaskError):
     """Ошибка для случая, когда пользователь не является владельцем задачи."""
 
     pass
+
+
+class ChangesCursorExpired(TaskError):
+    """Ошибка для курсора синхронизации старше очищенной части журнала."""
+
+    pass
@@ -1,7 +1,20 @@
-from datetime import date
+from datetime import date, datetime
 
 from typing import TYPE_CHECKING
-from sqlalchemy import Date, ForeignKey, Integer, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Enum as SQLEnum,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from enum import Enum
 
@@ -11,6 +24,11 @@ if TYPE_CHECKING:
     from core.models.model_user import User
 
 
+# Конфигурация полнотекстового поиска: русская морфология, латиница
+# разбирается английским стеммером.
+TASK_SEARCH_CONFIG = "russian"
+
+
 class PermissionType(Enum):
     READ = "read"
     UPDATE = "update"
@@ -23,6 +41,17 @@ class Task(Base):
     date_from: Mapped[date] = mapped_column(Date)
     date_to: Mapped[date] = mapped_column(Date)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    # Поисковый вектор вычисляется самой БД при каждой вставке и обновлении,
+    # название весит больше описания. ORM его не загружает.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', name_task), 'A') || "
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     user: Mapped["User"] = relationship(
         "User",
@@ -35,6 +64,12 @@ class Task(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index("ix_tasks_date_from_date_to", "date_from", "date_to"),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
 
 class TaskPermission(Base):
 
@@ -54,4 +89,43 @@ class TaskPermission(Base):
         UniqueConstraint(
             "task_id", "user_id", "permission", name="uq_task_user_permission"
         ),
+        Index(
+            "ix_taskpermissions_user_id_permission_task_id",
+            "user_id",
+            "permission",
+            "task_id",
+        ),
     )
+
+
+class TaskVersionShard(Base):
+    """
+    Шардированный счетчик изменений всех задач.
+
+    Каждая запись увеличивает один случайный шард, а версия - сумма шардов.
+    Так счетчик транзакционен и не становится общей горячей строкой.
+    """
+
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0")
+
+
+class TaskChange(Base):
+    """
+    Журнал изменений задач для инкрементальной синхронизации.
+
+    На каждое изменение задачи пишется строка для каждого затронутого
+    пользователя: владельца и получателей права на чтение. action - вид
+    изменения (create, update, delete, grant, revoke). Внешнего ключа на
+    задачу нет, чтобы запись пережила удаление задачи и стала для клиента
+    tombstone. created_at нужен для срока хранения tombstone при очистке.
+    """
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    task_id: Mapped[int]
+    action: Mapped[str] = mapped_column(String(16))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    __table_args__ = (Index("ix_taskchanges_user_id_id", "user_id", "id"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import String
+from sqlalchemy import BigInteger, String
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 from typing import TYPE_CHECKING
 
@@ -12,6 +12,12 @@ class User(Base):
 
     email: Mapped[str] = mapped_column(String, unique=True)
     hash_password: Mapped[str] = mapped_column(String(255))
+    # Версия списка доступных пользователю задач, растет при каждом изменении
+    # его задач или выданных ему прав. Используется для ETag.
+    tasks_version: Mapped[int] = mapped_column(BigInteger, server_default="0")
+    # Наибольший id удаленного очисткой tombstone из журнала изменений.
+    # Курсор /tasks/changes меньше него мог пропустить удаление задачи.
+    changes_pruned_id: Mapped[int] = mapped_column(BigInteger, server_default="0")
 
     task: Mapped["Task"] = relationship(
         "Task", back_populates="user", cascade="all, delete-orphan"
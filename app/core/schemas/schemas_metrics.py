@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checkouts: int | None = None
+    timeouts: int | None = None
+    wait_avg_ms: float | None = None
+    wait_max_ms: float | None = None
+
+
+class PasswordHasherStatus(BaseModel):
+    executor: str
+    workers: int
+    in_flight: int
+    queued: int
+    max_queued: int
+    completed: int
+
+
+class CacheStatus(BaseModel):
+    size: int
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from app.core.models.model_task import PermissionType
+
 
 class TaskPermissionCreate(BaseModel):
     user_id: int
@@ -11,3 +13,13 @@ class TaskPermissionResponse(BaseModel):
     task_id: int
     user_id: int
     permission: str
+
+
+class TaskPermissionItem(BaseModel):
+    task_id: int
+    user_id: int
+    permission: PermissionType
+
+
+class TaskPermissionBatch(BaseModel):
+    items: list[TaskPermissionItem]
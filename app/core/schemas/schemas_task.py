@@ -27,3 +27,32 @@ class TaskRead(BaseModel):
 
 class TaskUpdate(BaseTask):
     pass
+
+
+class TaskFilter(BaseModel):
+    date_from: date | None = None
+    date_to: date | None = None
+    name_prefix: str | None = None
+
+
+class TaskPage(BaseModel):
+    items: list[TaskRead]
+    next_cursor: int | None = None
+
+
+class TaskBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class TaskBulkCreateResult(BaseModel):
+    created: int
+    ids: list[int]
+    errors: list[TaskBulkError]
+
+
+class TaskChanges(BaseModel):
+    upserts: list[TaskRead]
+    deleted: list[int]
+    cursor: int
+    has_more: bool
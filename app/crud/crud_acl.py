@@ -0,0 +1,117 @@
+from enum import IntFlag
+from typing import Iterable
+
+from sqlalchemy import case, exists, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.base.invalidation import invalidation_bus
+from app.core.config import settings
+from app.core.models.model_task import PermissionType, Task, TaskPermission
+from app.utils.cache import TTLCache
+
+
+class Access(IntFlag):
+    NONE = 0
+    OWNER = 1
+    READ = 2
+    UPDATE = 4
+
+
+PERMISSION_ACCESS = {
+    PermissionType.READ: Access.READ,
+    PermissionType.UPDATE: Access.UPDATE,
+}
+
+# Маркер пользователя, у которого слишком много задач для кеша: для него
+# права проверяются запросом SELECT EXISTS.
+TOO_LARGE = object()
+
+# user_id -> {task_id: Access} со всеми задачами, доступными пользователю.
+acl_cache = TTLCache("acl", settings.ACL_CACHE_SIZE, settings.ACL_CACHE_TTL)
+
+
+async def load_user_acl(session: AsyncSession, user_id: int):
+    """
+    Загружает одним запросом права пользователя на все доступные ему задачи.
+
+    Возвращает TOO_LARGE, если записей больше ACL_USER_MAX_ENTRIES.
+    """
+    owned = select(
+        Task.id.label("task_id"), literal(int(Access.OWNER)).label("access")
+    ).where(Task.user_id == user_id)
+    shared = select(
+        TaskPermission.task_id,
+        case(
+            (TaskPermission.permission == PermissionType.READ, int(Access.READ)),
+            else_=int(Access.UPDATE),
+        ),
+    ).where(TaskPermission.user_id == user_id)
+    stmt = union_all(owned, shared).limit(settings.ACL_USER_MAX_ENTRIES + 1)
+    rows = (await session.execute(stmt)).all()
+    if len(rows) > settings.ACL_USER_MAX_ENTRIES:
+        return TOO_LARGE
+    acl: dict[int, Access] = {}
+    for task_id, access in rows:
+        acl[task_id] = acl.get(task_id, Access.NONE) | Access(access)
+    return acl
+
+
+async def check_access_in_db(
+    session: AsyncSession, user_id: int, task_id: int, required: Access
+) -> bool:
+    """Проверка прав одним SELECT EXISTS, без загрузки строк."""
+    clauses = []
+    if Access.OWNER in required:
+        clauses.append(exists().where(Task.id == task_id, Task.user_id == user_id))
+    permissions = [p for p, access in PERMISSION_ACCESS.items() if access in required]
+    if permissions:
+        clauses.append(
+            exists().where(
+                TaskPermission.task_id == task_id,
+                TaskPermission.user_id == user_id,
+                TaskPermission.permission.in_(permissions),
+            )
+        )
+    if not clauses:
+        return False
+    found = await session.execute(select(*clauses))
+    return any(found.one())
+
+
+async def has_access(
+    session: AsyncSession, user_id: int, task_id: int, required: Access
+) -> bool:
+    """
+    Есть ли у пользователя хотя бы одно из прав required на задачу.
+
+    Права пользователя загружаются в кеш целиком при первом обращении,
+    поэтому в установившемся режиме проверка не обращается к БД.
+    Если права сбросили, пока шла загрузка, результат не кешируется:
+    он мог быть прочитан до отзыва разрешения.
+    """
+    acl = acl_cache.get(user_id)
+    if acl is None:
+        generation = acl_cache.generation(user_id)
+        acl = await load_user_acl(session, user_id)
+        acl_cache.set(user_id, acl, generation=generation)
+    if acl is TOO_LARGE:
+        return await check_access_in_db(session, user_id, task_id, required)
+    return bool(acl.get(task_id, Access.NONE) & required)
+
+
+def drop_users_acl(user_ids: list[int]):
+    for user_id in user_ids:
+        acl_cache.invalidate(user_id)
+
+
+invalidation_bus.register("acl_user", drop_users_acl)
+invalidation_bus.register("all", lambda ids: acl_cache.clear())
+
+
+def invalidate_user_acl(session: AsyncSession, user_ids: Iterable[int]):
+    """
+    Сбрасывает права пользователей во всех воркерах.
+
+    Вызывается при выдаче и отзыве разрешений и удалении задач.
+    """
+    invalidation_bus.publish(session, "acl_user", user_ids)
@@ -1,35 +1,30 @@
-from sqlalchemy import select
+from sqlalchemy import select, delete, exists, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.base.db_helper import db_helper as db
 from app.core.exceptions.errors_permission_task import (
     PermissionAlreadyExists,
     PermissionNotFound,
 )
+from app.core.exceptions.errors_task import TaskNotFound, NotOwnerError
 from app.core.exceptions.general_errors import DataBaseError
-from app.core.models.model_task import TaskPermission, PermissionType
-from app.core.schemas.schemas_permission import TaskPermissionResponse
-
-
-async def get_permission(
-    task_id: int, user_id: int, required_permission: PermissionType, owner_id: int
-) -> TaskPermissionResponse:
-    try:
-        async with db.session_factory() as session:
-            requery = select(TaskPermission).where(
-                TaskPermission.task_id == task_id,
-                TaskPermission.user_id == user_id,
-                TaskPermission.permission == required_permission,
-            )
-            permission = await session.execute(requery)
-            return permission.scalar_one_or_none()
-    except IntegrityError:
-        await session.rollback()
-        raise DataBaseError("Ошибка целостности базы данных")
+from app.core.config import settings
+from app.core.models.model_task import Task, TaskPermission, PermissionType
+from app.crud.crud_acl import invalidate_user_acl
+from app.crud.crud_version import record_task_changes
+from app.core.schemas.schemas_permission import (
+    TaskPermissionItem,
+    TaskPermissionResponse,
+)
 
 
 async def grand_permission(
-    task_id: int, user_id: int, required_permission: PermissionType, owner_id: int
+    session: AsyncSession,
+    task_id: int,
+    user_id: int,
+    required_permission: PermissionType,
+    owner_id: int,
 ) -> TaskPermissionResponse:
     """
     Предоставляет разрешение пользователю на указанную задачу.
@@ -37,52 +32,150 @@ async def grand_permission(
     Проверяет, существует ли уже разрешение для данной задачи и пользователя.
     Если разрешения нет, создает новое. Если разрешение уже существует, выбрасывает HTTPException.
     """
-    async with db.session_factory() as session:
-        try:
-            task_permission = TaskPermission(
-                task_id=task_id, user_id=user_id, permission=required_permission
-            )
-            session.add(task_permission)
-            await session.commit()
-            await session.refresh(task_permission)
-            return task_permission
-        except IntegrityError:
-            await session.rollback()
-            raise PermissionAlreadyExists(
-                f"Разрешение: {required_permission},"
-                f"для пользователя: {user_id} уже существует."
-            )
+    try:
+        task_permission = TaskPermission(
+            task_id=task_id, user_id=user_id, permission=required_permission
+        )
+        session.add(task_permission)
+        await session.flush()
+        if required_permission == PermissionType.READ:
+            await record_task_changes(session, "grant", pairs=[(task_id, user_id)])
+        invalidate_user_acl(session, [user_id])
+        return task_permission
+    except IntegrityError:
+        raise PermissionAlreadyExists(
+            f"Разрешение: {required_permission},"
+            f"для пользователя: {user_id} уже существует."
+        )
 
 
 async def revoke_permission(
-    task_id: int, user_id: int, required_permission: PermissionType, owner_id: int
+    session: AsyncSession,
+    task_id: int,
+    user_id: int,
+    required_permission: PermissionType,
+    owner_id: int,
 ) -> TaskPermissionResponse:
     """
     Отзывает разрешения у пользователя на указанную задачу.
 
-    Проверяет наличие разрешения для данной задачи и пользователя.
-    Если разрешение существует, удаляет его. Если разрешение не найдено, возвращает None.
+    Удаление выполняется одним запросом DELETE ... RETURNING с проверкой,
+    что owner_id владеет задачей. Если ничего не удалено, задача загружается,
+    чтобы выбрать ошибку: задача не найдена, чужая задача или нет разрешения.
     """
+    is_owner = exists().where(Task.id == task_id, Task.user_id == owner_id)
     try:
-        async with db.session_factory() as session:
-            # Проверка наличия разрешения
-            request = select(TaskPermission).filter(
+        stmt = (
+            delete(TaskPermission)
+            .where(
                 TaskPermission.task_id == task_id,
                 TaskPermission.user_id == user_id,
                 TaskPermission.permission == required_permission,
+                is_owner,
             )
-            result = await session.execute(request)
-            permission = result.scalar_one_or_none()
+            .returning(*TaskPermission.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        permission = result.mappings().one_or_none()
+    except IntegrityError:
+        raise DataBaseError("Ошибка целостности базы данных")
 
-            if permission is None:
-                raise PermissionNotFound(
-                    f"Разрешение для task_id {task_id} и user_id {user_id} не найдено"
-                )
+    if permission is None:
+        task_owner_id = await session.scalar(
+            select(Task.user_id).where(Task.id == task_id)
+        )
+        if task_owner_id is None:
+            raise TaskNotFound(f"Task with id {task_id} not found")
+        if task_owner_id != owner_id:
+            raise NotOwnerError(
+                f"User with id {owner_id} is not authorized to modify this task"
+            )
+        raise PermissionNotFound(
+            f"Разрешение для task_id {task_id} и user_id {user_id} не найдено"
+        )
+    if required_permission == PermissionType.READ:
+        await record_task_changes(session, "revoke", pairs=[(task_id, user_id)])
+    invalidate_user_acl(session, [user_id])
+    return permission
 
-            # Удаление разрешения
-            await session.delete(permission)
-            await session.commit()
-            return permission
+
+def permission_batches(items: list[TaskPermissionItem]) -> list[list[tuple]]:
+    """Уникальные тройки (task_id, user_id, permission), разбитые на пачки."""
+    triples = list(dict.fromkeys((i.task_id, i.user_id, i.permission) for i in items))
+    size = settings.TASKS_BULK_BATCH_SIZE
+    return [triples[start : start + size] for start in range(0, len(triples), size)]
+
+
+def read_pairs(permissions: list) -> list[tuple[int, int]]:
+    """
+    Пары (task_id, user_id) для журнала изменений.
+
+    Видимость задачи меняет только право на чтение, выдача и отзыв права
+    на обновление в журнал не пишутся.
+    """
+    return [
+        (permission.task_id, permission.user_id)
+        for permission in permissions
+        if permission.permission == PermissionType.READ
+    ]
+
+
+async def grand_permissions(
+    session: AsyncSession, items: list[TaskPermissionItem]
+) -> list[TaskPermissionResponse]:
+    """
+    Выдает пачку разрешений через INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Уже существующие разрешения пропускаются, возвращаются только новые.
+    Владение задачами должно быть проверено заранее.
+    """
+    granted = []
+    try:
+        for batch in permission_batches(items):
+            stmt = (
+                insert(TaskPermission)
+                .values(
+                    [
+                        {"task_id": task_id, "user_id": user_id, "permission": perm}
+                        for task_id, user_id, perm in batch
+                    ]
+                )
+                .on_conflict_do_nothing(constraint="uq_task_user_permission")
+                .returning(*TaskPermission.__table__.columns)
+            )
+            result = await session.execute(stmt)
+            granted.extend(result.mappings().all())
     except IntegrityError:
-        await session.rollback()
         raise DataBaseError("Ошибка целостности базы данных")
+    await record_task_changes(session, "grant", pairs=read_pairs(granted))
+    invalidate_user_acl(session, [permission.user_id for permission in granted])
+    return granted
+
+
+async def revoke_permissions(
+    session: AsyncSession, items: list[TaskPermissionItem]
+) -> list[TaskPermissionResponse]:
+    """
+    Отзывает пачку разрешений одним DELETE ... WHERE (task_id, user_id,
+    permission) IN (...) RETURNING на каждую пачку.
+
+    Возвращает только действительно удаленные разрешения.
+    Владение задачами должно быть проверено заранее.
+    """
+    revoked = []
+    key = tuple_(
+        TaskPermission.task_id, TaskPermission.user_id, TaskPermission.permission
+    )
+    for batch in permission_batches(items):
+        stmt = (
+            delete(TaskPermission)
+            .where(key.in_(batch))
+            .returning(*TaskPermission.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        revoked.extend(result.mappings().all())
+    await record_task_changes(session, "revoke", pairs=read_pairs(revoked))
+    invalidate_user_acl(session, [permission.user_id for permission in revoked])
+    return revoked
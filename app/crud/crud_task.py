@@ -1,145 +1,378 @@
-from fastapi import HTTPException
-from sqlalchemy import select, update, delete
+from typing import AsyncIterator
+
+from sqlalchemy import select, insert, update, delete, union, exists, or_, and_, func
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.base.db_helper import db_helper as db
-from app.core.exceptions.errors_task import TaskNotFound, NotOwnerError
+from app.core.config import settings
+from app.core.exceptions.errors_task import (
+    ChangesCursorExpired,
+    TaskNotFound,
+    NotOwnerError,
+)
 from app.core.exceptions.general_errors import DataBaseError
-from app.core.models.model_task import Task, TaskPermission, PermissionType
-from app.core.schemas.schemas_task import TaskCreate, TaskRead, TaskUpdate
+from app.core.models.model_task import (
+    Task,
+    TaskChange,
+    TaskPermission,
+    PermissionType,
+    TASK_SEARCH_CONFIG,
+)
+from app.core.models.model_user import User
+from app.core.schemas.schemas_task import (
+    TaskCreate,
+    TaskRead,
+    TaskUpdate,
+    TaskPage,
+    TaskChanges,
+    TaskFilter,
+)
 from app.core.schemas.schemas_user import UserRead
-from app.crud.crud_user import check_user_permission
+from app.crud.crud_acl import invalidate_user_acl
+from app.crud.crud_version import record_task_changes
 from app.core.exceptions.errors_user import UserHasNoPermission
 
+# Колонки задачи в порядке полей TaskRead: строки выборки совпадают
+# со схемой ответа и могут отдаваться клиенту без пересборки.
+task_columns = [Task.__table__.c[name] for name in TaskRead.model_fields]
+
 
-async def task_create(task_in: TaskCreate, user: UserRead) -> TaskRead:
+async def task_create(
+    session: AsyncSession, task_in: TaskCreate, user: UserRead
+) -> TaskRead:
     try:
-        async with db.session_factory() as session:
-            new_task = Task(
-                name_task=task_in.name_task,
-                description=task_in.description,
-                date_from=task_in.date_from,
-                date_to=task_in.date_to,
-                user_id=user.id,
+        new_task = Task(
+            name_task=task_in.name_task,
+            description=task_in.description,
+            date_from=task_in.date_from,
+            date_to=task_in.date_to,
+            user_id=user.id,
+        )
+        session.add(new_task)
+        await session.flush()
+        # Кеш прав владельца не сбрасывается: новой задачи в нем нет, и
+        # verify_task_owner при отказе кеша проверяет Task.user_id в БД.
+        await record_task_changes(session, "create", pairs=[(new_task.id, user.id)])
+        return new_task
+    except IntegrityError:
+        raise DataBaseError(f"Ошибка целостности данных.")
+
+
+async def tasks_bulk_create(
+    session: AsyncSession, tasks_in: list[TaskCreate], user: UserRead
+) -> list[int]:
+    """
+    Создает пачку задач одним многострочным INSERT ... RETURNING id.
+
+    Возвращает id созданных задач в порядке tasks_in.
+    """
+    if not tasks_in:
+        return []
+    try:
+        stmt = (
+            insert(Task)
+            .values(
+                [{**task_in.model_dump(), "user_id": user.id} for task_in in tasks_in]
             )
-            session.add(new_task)
-            await session.commit()
-            await session.refresh(new_task)
-            return new_task
+            .returning(Task.id)
+        )
+        task_ids = list(await session.scalars(stmt))
+        await record_task_changes(
+            session, "create", pairs=[(task_id, user.id) for task_id in task_ids]
+        )
+        return task_ids
     except IntegrityError:
-        await session.rollback()
         raise DataBaseError(f"Ошибка целостности данных.")
 
 
-async def get_tasks() -> list[TaskRead]:
-    async with db.session_factory() as session:
-        tasks = await session.execute(select(Task.__table__.columns).order_by(Task.id))
-        return tasks.mappings().all()
+def make_page(rows: list[RowMapping], limit: int) -> TaskPage:
+    """
+    Формирует страницу из выборки размером limit + 1.
 
+    Лишняя строка только сигнализирует о наличии следующей страницы,
+    курсором служит id последней задачи на странице.
+    """
+    items = rows[:limit]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
-async def get_task_by_id(task_id: int):
-    async with db.session_factory() as session:
-        request = select(Task).where(Task.id == task_id)
-        task = await session.execute(request)
-        return task.one_or_none()
 
+async def get_tasks(
+    session: AsyncSession, after_id: int = 0, limit: int = 100
+) -> TaskPage:
+    """
+    Возвращает страницу задач с id больше after_id (keyset-пагинация по Task.id).
+    """
+    stmt = (
+        select(*task_columns)
+        .where(Task.id > after_id)
+        .order_by(Task.id)
+        .limit(limit + 1)
+    )
+    tasks = await session.execute(stmt)
+    return make_page(tasks.mappings().all(), limit)
 
-async def get_accessible_task(
-    user_id: int, permission: PermissionType
-) -> list[TaskRead]:
+
+async def stream_tasks(after_id: int = 0) -> AsyncIterator[RowMapping]:
+    """
+    Потоково отдает задачи с id больше after_id через серверный курсор.
+
+    Строки читаются пачками по TASKS_STREAM_BATCH_SIZE, поэтому расход памяти
+    не зависит от размера таблицы. Сессия открывается здесь, а не берется
+    из запроса: ответ отдается уже после закрытия зависимостей эндпоинта.
+    """
     async with db.session_factory() as session:
         stmt = (
-            select(Task)
-            .distinct(Task.id)  # Удаляем дубликаты
-            .outerjoin(TaskPermission, Task.id == TaskPermission.task_id)
-            .filter(
-                (
-                    (TaskPermission.user_id == user_id)
-                    & (TaskPermission.permission == permission.READ)
-                )
-                | (Task.user_id == user_id)
-            )
-            .options(joinedload(Task.pr_task))  # Загружаем связанные данные
+            select(*task_columns)
+            .where(Task.id > after_id)
             .order_by(Task.id)
+            .execution_options(yield_per=settings.TASKS_STREAM_BATCH_SIZE)
+        )
+        result = await session.stream(stmt)
+        async for task in result.mappings():
+            yield task
+
+
+def task_filter_clauses(filters: TaskFilter) -> list:
+    """Условия WHERE для фильтров по датам и префиксу названия задачи."""
+    clauses = []
+    if filters.date_from is not None:
+        clauses.append(Task.date_from >= filters.date_from)
+    if filters.date_to is not None:
+        clauses.append(Task.date_to <= filters.date_to)
+    if filters.name_prefix:
+        clauses.append(Task.name_task.startswith(filters.name_prefix, autoescape=True))
+    return clauses
+
+
+async def get_accessible_task(
+    session: AsyncSession,
+    user_id: int,
+    permission: PermissionType,
+    after_id: int = 0,
+    limit: int = 100,
+    filters: TaskFilter = TaskFilter(),
+) -> TaskPage:
+    """
+    Возвращает страницу задач, доступных пользователю.
+
+    Запрос собирается как UNION двух веток: задачи пользователя и задачи,
+    к которым ему выдано разрешение. Каждая ветка ограничена limit + 1
+    строками по индексу, поэтому время ответа зависит от размера страницы,
+    а не от общего числа доступных задач.
+    """
+    clauses = [Task.id > after_id, *task_filter_clauses(filters)]
+    owned = (
+        select(*task_columns)
+        .where(Task.user_id == user_id, *clauses)
+        .order_by(Task.id)
+        .limit(limit + 1)
+    )
+    shared = (
+        select(*task_columns)
+        .join(TaskPermission, Task.id == TaskPermission.task_id)
+        .where(
+            TaskPermission.user_id == user_id,
+            TaskPermission.permission == permission,
+            *clauses,
         )
-        result = await session.execute(stmt)
-        tasks = result.scalars().all()
-        return tasks
+        .order_by(Task.id)
+        .limit(limit + 1)
+    )
+    accessible = union(owned, shared).subquery()
+    stmt = select(accessible).order_by(accessible.c.id).limit(limit + 1)
+    result = await session.execute(stmt)
+    return make_page(result.mappings().all(), limit)
 
 
 async def update_task_with_permission_check(
+    session: AsyncSession,
     user_id: int,
     task_id: int,
-    task_update: TaskCreate,
+    task_update: TaskUpdate,
 ) -> TaskRead:
-    async with db.session_factory() as session:
-        try:
-            # Проверяем, существует ли задача
-            task = await get_task_by_id(task_id)
-            if not task:
-                raise TaskNotFound(f"Задача с id {task_id} не найдена.")
-
-            # Проверяем права доступа пользователя к задаче
-            if not await check_user_permission(user_id, task_id, PermissionType.UPDATE):
-                raise PermissionError(
-                    f"У пользователя нет прав на обновление задачи с id {task_id}."
-                )
-        except UserHasNoPermission:
-            raise HTTPException(
-                status_code=400,
-                detail=f"У пользователя нет прав на обновление задачи с id {task_id}.",
-            )
+    """
+    Обновляет задачу, если пользователь ее владелец или имеет право UPDATE.
 
-        # Обновление задачи
-        updated_task = await update_task(task_id, task_update)
-        if not updated_task:
+    Проверка прав и обновление выполняются одним запросом
+    UPDATE ... WHERE ... RETURNING. Только если ни одна строка не обновлена,
+    отдельным запросом выясняется, нет задачи или нет прав.
+    """
+    has_update_permission = exists().where(
+        TaskPermission.task_id == Task.id,
+        TaskPermission.user_id == user_id,
+        TaskPermission.permission == PermissionType.UPDATE,
+    )
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, or_(Task.user_id == user_id, has_update_permission))
+        .values(
+            name_task=task_update.name_task,
+            description=task_update.description,
+            date_from=task_update.date_from,
+            date_to=task_update.date_to,
+        )
+        .returning(*task_columns)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    updated_task = result.mappings().one_or_none()
+    if updated_task is None:
+        if not await session.scalar(select(exists().where(Task.id == task_id))):
             raise TaskNotFound(f"Задача с id {task_id} не найдена.")
+        raise UserHasNoPermission(
+            f"У пользователя нет прав на обновление задачи с id {task_id}."
+        )
+    await record_task_changes(session, "update", task_ids=[task_id])
+    return updated_task
 
-        return TaskRead.from_orm(updated_task)
 
+async def delete_task_by_id(session: AsyncSession, task_id: int, user_id: int):
+    """
+    Удаляет задачу по её ID.
 
-async def update_task(task_id: int, task_update: TaskUpdate) -> Task:
-    async with db.session_factory() as session:
-        update_stmt = (
-            update(Task)
-            .where(Task.id == task_id)
-            .values(
-                name_task=task_update.name_task,
-                description=task_update.description,
-                date_from=task_update.date_from,
-                date_to=task_update.date_to,
-            )
-            .execution_options(synchronize_session="fetch")
+    Удаление с проверкой владельца выполняется одним запросом
+    DELETE ... RETURNING. Если ничего не удалено, задача загружается,
+    чтобы отличить отсутствие задачи от чужой задачи.
+    Получатели прав выбираются CTE в том же запросе: он видит снимок до
+    каскадного удаления прав. Журнал изменений и версии пишутся только
+    после успешного удаления, кеш прав сбрасывается только у владельца
+    и получателей прав.
+    """
+    grantees = (
+        select(TaskPermission.user_id, TaskPermission.permission)
+        .where(TaskPermission.task_id == task_id)
+        .cte("grantees")
+    )
+    reader_ids = func.array_agg(grantees.c.user_id).filter(
+        grantees.c.permission == PermissionType.READ
+    )
+    delete_stmt = (
+        delete(Task)
+        .where(Task.id == task_id, Task.user_id == user_id)
+        .returning(
+            Task.id,
+            select(reader_ids).scalar_subquery(),
+            select(func.array_agg(grantees.c.user_id)).scalar_subquery(),
         )
-        await session.execute(update_stmt)
-        await session.commit()
+        .add_cte(grantees)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        deleted = (await session.execute(delete_stmt)).one_or_none()
+    except IntegrityError:
+        raise DataBaseError("Ошибка целостности базы данных")
 
-        result = await session.execute(select(Task).filter(Task.id == task_id))
-        return result.scalars().one_or_none()
+    if deleted is None:
+        owner_id = await session.scalar(select(Task.user_id).where(Task.id == task_id))
+        if owner_id is None:
+            raise TaskNotFound(f"Задача с id {task_id} не найдена")
+        raise NotOwnerError("Пользователь не является владельцем задачи.")
 
+    _, readers, grantees = deleted
+    audience = [user_id, *(readers or [])]
+    await record_task_changes(
+        session, "delete", pairs=[(task_id, member) for member in audience]
+    )
+    invalidate_user_acl(session, [user_id, *(grantees or [])])
 
-async def delete_task_by_id(task_id: int, user_id: int):
-    """Удаляет задачу по её ID."""
-    try:
-        async with db.session_factory() as session:
-            # Проверка наличия задачи
-            task_stmt = select(Task).where(Task.id == task_id)
-            task_result = await session.execute(task_stmt)
-            task = task_result.scalars().first()
 
-            if not task:
-                raise TaskNotFound(f"Задача с id {task_id} не найдена")
+async def get_task_changes(
+    session: AsyncSession, user_id: int, since: int = 0, limit: int = 100
+) -> TaskChanges:
+    """
+    Изменения задач пользователя после курсора since.
 
-            # Проверка прав доступа
-            if task.user_id != user_id:
-                raise NotOwnerError("Пользователь не является владельцем задачи.")
+    Из журнала по индексу (user_id, id) берутся задачи с записями после
+    курсора, каждая один раз по последней записи. Видимые пользователю задачи
+    (свои и с правом на чтение) возвращаются целиком, остальные - как id
+    удаленных. Работа зависит от числа изменений, а не от числа задач.
+    Если очистка журнала удалила tombstone новее курсора, выбрасывает
+    ChangesCursorExpired: клиенту нужна полная загрузка с since=0.
+    Последняя запись пользователя не очищается, поэтому при таком курсоре
+    выборка не пуста и отметка очистки приходит в той же строке.
+    """
+    latest = (
+        select(TaskChange.task_id, func.max(TaskChange.id).label("change_id"))
+        .where(TaskChange.user_id == user_id, TaskChange.id > since)
+        .group_by(TaskChange.task_id)
+        .order_by(func.max(TaskChange.id))
+        .limit(limit + 1)
+        .subquery("latest")
+    )
+    can_read = exists().where(
+        TaskPermission.task_id == Task.id,
+        TaskPermission.user_id == user_id,
+        TaskPermission.permission == PermissionType.READ,
+    )
+    pruned_id = select(User.changes_pruned_id).where(User.id == user_id)
+    stmt = (
+        select(
+            latest.c.task_id,
+            latest.c.change_id,
+            pruned_id.scalar_subquery().label("pruned_id"),
+            *task_columns,
+        )
+        .select_from(latest)
+        .outerjoin(
+            Task,
+            and_(Task.id == latest.c.task_id, or_(Task.user_id == user_id, can_read)),
+        )
+        .order_by(latest.c.change_id)
+    )
+    rows = (await session.execute(stmt)).mappings().all()
+    if since and rows and since < rows[0]["pruned_id"]:
+        raise ChangesCursorExpired("Курсор синхронизации устарел")
+    page = rows[:limit]
+    return {
+        "upserts": [row for row in page if row["id"] is not None],
+        "deleted": [row["task_id"] for row in page if row["id"] is None],
+        "cursor": page[-1]["change_id"] if page else since,
+        "has_more": len(rows) > limit,
+    }
 
-            # Выполнение запроса на удаление
-            delete_stmt = delete(Task).where(Task.id == task_id)
-            await session.execute(delete_stmt)
-            await session.commit()
 
-    except IntegrityError:
-        await session.rollback()
-        raise HTTPException(status_code=500, detail="Ошибка целостности базы данных")
+async def search_tasks(
+    session: AsyncSession,
+    user_id: int,
+    query: str,
+    offset: int = 0,
+    limit: int = 100,
+) -> TaskPage:
+    """
+    Полнотекстовый поиск по названию и описанию доступных пользователю задач.
+
+    Запрос разбирается websearch_to_tsquery ("слова в кавычках", -исключение,
+    or). Совпадения ищутся по GIN-индексу search_vector в двух ветках, как
+    в get_accessible_task: свои задачи и задачи с правом на чтение.
+    Результаты упорядочены по релевантности, курсор - смещение в выдаче.
+    """
+    tsquery = func.websearch_to_tsquery(TASK_SEARCH_CONFIG, query)
+    matches = Task.search_vector.op("@@")(tsquery)
+    owned = select(Task.id).where(Task.user_id == user_id, matches)
+    shared = (
+        select(Task.id)
+        .join(TaskPermission, Task.id == TaskPermission.task_id)
+        .where(
+            TaskPermission.user_id == user_id,
+            TaskPermission.permission == PermissionType.READ,
+            matches,
+        )
+    )
+    found = union(owned, shared).subquery()
+    rank = func.ts_rank_cd(Task.search_vector, tsquery)
+    stmt = (
+        select(*task_columns)
+        .join(found, Task.id == found.c.id)
+        .order_by(rank.desc(), Task.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    result = await session.execute(stmt)
+    rows = result.mappings().all()
+    return {
+        "items": rows[:limit],
+        "next_cursor": offset + limit if len(rows) > limit else None,
+    }
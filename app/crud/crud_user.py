@@ -1,72 +1,88 @@
 from pydantic import EmailStr
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.base.invalidation import invalidation_bus
+from app.core.config import settings
 from app.core.models.model_user import User
-from app.core.base.db_helper import db_helper as db
 from app.core.schemas.schemas_user import UserCreate, UserRead
-from app.utils.func_by_auth import get_password_hash
+from app.utils.func_by_auth import token_cache
 from app.core.exceptions.general_errors import DataBaseError
-from app.core.models.model_task import PermissionType, Task, TaskPermission
-from app.core.exceptions.errors_user import UserHasNoPermission
+from app.utils.cache import TTLCache
 
+user_cache = TTLCache("user", settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
 
-async def create_user(user_reg: UserCreate) -> UserRead:
+
+def drop_users(user_ids: list[int]):
+    """Удаляет из кешей пользователей и их проверенные токены."""
+    subjects = {str(user_id) for user_id in user_ids}
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    token_cache.invalidate_where(lambda key, payload: payload.get("sub") in subjects)
+
+
+def drop_all_users(ids: list):
+    user_cache.clear()
+    token_cache.clear()
+
+
+invalidation_bus.register("user", drop_users)
+invalidation_bus.register("all", drop_all_users)
+
+
+async def create_user(
+    session: AsyncSession, email: EmailStr, hash_password: str
+) -> UserRead:
     """
-    Создает нового пользователя.
+    Создает нового пользователя с уже посчитанным хешем пароля.
 
-    Принимает данные для регистрации пользователя, хеширует пароль,
-    создает нового пользователя в базе данных и возвращает информацию о пользователе.
+    Хеш считается до первого запроса сессии, чтобы соединение из пула
+    не простаивало в открытой транзакции, пока работает bcrypt.
     """
     try:
-        async with db.session_factory() as session:
-            new_user = User(
-                email=user_reg.email,
-                hash_password=get_password_hash(user_reg.hash_password),
-            )
-            session.add(new_user)
-            await session.commit()
-            await session.refresh(new_user)
-            return new_user
+        new_user = User(email=email, hash_password=hash_password)
+        session.add(new_user)
+        await session.flush()
+        invalidate_cached_user(session, new_user.id)
+        return new_user
     except IntegrityError:
-        await session.rollback()
         raise DataBaseError(f"Ошибка целостности данных.")
 
 
-async def get_user_by_email(user_email: str) -> UserRead:
-    async with db.session_factory() as session:
-        request = select(User.__table__.columns).where(User.email == user_email)
-        user = await session.execute(request)
-        return user.mappings().one_or_none()
-
-
-async def get_user_by_id(user_id: int) -> UserRead:
-    async with db.session_factory() as session:
-        request = select(User.__table__.columns).where(User.id == user_id)
-        user = await session.execute(request)
-        return user.mappings().one_or_none()
-
-
-async def check_user_permission(
-    user_id: int, task_id: int, permission: PermissionType
-) -> bool:
-    async with db.session_factory() as session:
-        stmt = (
-            select(Task)
-            .outerjoin(TaskPermission, Task.id == TaskPermission.task_id)
-            .filter(
-                (Task.id == task_id)
-                & (
-                    (
-                        (TaskPermission.user_id == user_id)
-                        & (TaskPermission.permission == permission)
-                    )
-                    | (Task.user_id == user_id)
-                )
-            )
-        )
-        result = await session.execute(stmt)
-        task = result.scalars().one_or_none()
-        if not task:
-            raise UserHasNoPermission("У пользователя нет прав доступа к задаче")
-        return task
+async def get_user_by_email(session: AsyncSession, user_email: str) -> UserRead:
+    request = select(User.__table__.columns).where(User.email == user_email)
+    user = await session.execute(request)
+    return user.mappings().one_or_none()
+
+
+async def get_user_by_id(session: AsyncSession, user_id: int) -> UserRead:
+    request = select(User.__table__.columns).where(User.id == user_id)
+    user = await session.execute(request)
+    return user.mappings().one_or_none()
+
+
+async def get_cached_user(session: AsyncSession, user_id: int) -> UserRead | None:
+    """
+    Возвращает пользователя по id из кеша, при промахе загружает его из БД.
+
+    В кеше хранятся только id и email, без хеша пароля.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation(user_id)
+        row = await get_user_by_id(session, user_id)
+        if row is None:
+            return None
+        user = UserRead(id=row.id, email=row.email)
+        user_cache.set(user_id, user, generation=generation)
+    return user
+
+
+def invalidate_cached_user(session: AsyncSession, user_id: int):
+    """
+    Сбрасывает во всех воркерах кеш пользователя и его токенов.
+
+    Вызывается при создании и удалении пользователей.
+    """
+    invalidation_bus.publish(session, "user", [user_id])
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import Iterable
+
+from sqlalchemy import (
+    Integer,
+    String,
+    column,
+    delete,
+    func,
+    literal,
+    select,
+    union,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.base.db_helper import db_helper as db
+from app.core.base.invalidation import invalidation_bus
+from app.core.config import settings
+from app.core.models.model_task import (
+    PermissionType,
+    Task,
+    TaskChange,
+    TaskPermission,
+    TaskVersionShard,
+)
+from app.core.models.model_user import User
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки очистки журнала: чистит один воркер за раз.
+PRUNE_TASK_CHANGES_LOCK = 0x7461736B6368
+
+
+def task_audience(task_ids: list[int], pairs: list[tuple[int, int]]):
+    """
+    Пары (task_id, user_id) затронутых изменением пользователей.
+
+    Для task_ids это владельцы задач и получатели права на чтение - те же,
+    кому задачу отдает /tasks/changes. pairs передаются явно, например при
+    выдаче и отзыве права на чтение.
+    """
+    parts = []
+    if pairs:
+        parts.append(
+            select(
+                values(
+                    column("task_id", Integer), column("user_id", Integer), name="pairs"
+                ).data(pairs)
+            )
+        )
+    if task_ids:
+        parts.append(
+            select(Task.id.label("task_id"), Task.user_id).where(Task.id.in_(task_ids))
+        )
+        parts.append(
+            select(TaskPermission.task_id, TaskPermission.user_id).where(
+                TaskPermission.task_id.in_(task_ids),
+                TaskPermission.permission == PermissionType.READ,
+            )
+        )
+    return (parts[0] if len(parts) == 1 else union(*parts)).subquery("audience")
+
+
+async def record_task_changes(
+    session: AsyncSession,
+    action: str,
+    task_ids: Iterable[int] = (),
+    pairs: Iterable[tuple[int, int]] = (),
+) -> list[int]:
+    """
+    Отмечает изменение задач для ETag и журнала синхронизации.
+
+    Первым запросом увеличивает tasks_version затронутых пользователей и один
+    случайный шард общего счетчика, вторым пишет строки в журнал изменений.
+    Блокировка строк users берется до выдачи id журнала, поэтому для каждого
+    пользователя id записей растут в порядке фиксации транзакций и курсор
+    синхронизации не перепрыгивает незафиксированные изменения.
+    Для удаленной задачи права уже удалены каскадом, поэтому получатели
+    передаются через pairs из того же запроса, что удалил задачу.
+    Записи журнала хранят action и после коммита уходят SSE-подписчикам.
+    Возвращает id пользователей, чья версия изменилась.
+    """
+    task_ids, pairs = list(task_ids), list(dict.fromkeys(pairs))
+    if not task_ids and not pairs:
+        return []
+    audience = task_audience(task_ids, pairs)
+    bumped = (
+        update(User)
+        .where(User.id.in_(select(audience.c.user_id)))
+        .values(tasks_version=User.tasks_version + 1)
+        .returning(User.id)
+        .cte("bumped")
+    )
+    stmt = (
+        insert(TaskVersionShard)
+        .values(id=random.randrange(settings.TASK_VERSION_SHARDS), version=1)
+        .on_conflict_do_update(
+            index_elements=[TaskVersionShard.id],
+            set_={"version": TaskVersionShard.version + 1},
+        )
+        .returning(select(func.array_agg(bumped.c.id)).scalar_subquery())
+        .add_cte(bumped)
+    )
+    bumped_ids = await session.scalar(stmt)
+
+    audience = task_audience(task_ids, pairs)
+    changes = await session.execute(
+        insert(TaskChange)
+        .from_select(
+            ["task_id", "user_id", "action"],
+            select(
+                audience.c.task_id, audience.c.user_id, literal(action, String)
+            ).order_by(audience.c.user_id, audience.c.task_id),
+        )
+        .returning(TaskChange.user_id, TaskChange.task_id, TaskChange.id)
+    )
+    invalidation_bus.publish(
+        session,
+        "task_change",
+        [
+            (user_id, task_id, change_id, action)
+            for user_id, task_id, change_id in changes
+        ],
+        early=False,
+    )
+    return bumped_ids or []
+
+
+async def get_user_tasks_version(session: AsyncSession, user_id: int) -> int:
+    """Версия списка задач пользователя: один поиск по первичному ключу."""
+    version = await session.scalar(select(User.tasks_version).where(User.id == user_id))
+    return version or 0
+
+
+async def get_all_tasks_version(session: AsyncSession) -> int:
+    """Версия всех задач: сумма шардов общего счетчика."""
+    version = await session.scalar(
+        select(func.coalesce(func.sum(TaskVersionShard.version), literal(0)))
+    )
+    return int(version)
+
+
+async def prune_task_changes(session: AsyncSession, retention: timedelta) -> int:
+    """
+    Очистка журнала изменений задач.
+
+    Первым запросом удаляются записи, у которых есть более новая запись той
+    же задачи для того же пользователя: /tasks/changes берет по задаче только
+    последнюю запись, поэтому ответ для любого курсора не меняется. Вторым
+    удаляются tombstone (delete) старше retention, кроме последней записи
+    пользователя, и в users.changes_pruned_id запоминается наибольший
+    удаленный id: курсор старше него получает в /tasks/changes ответ 410.
+    Возвращает число удаленных записей, 0 - если очистку уже выполняет
+    другой воркер.
+    """
+    locked = await session.scalar(
+        select(func.pg_try_advisory_xact_lock(PRUNE_TASK_CHANGES_LOCK))
+    )
+    if not locked:
+        return 0
+    ranked = select(
+        TaskChange.id,
+        func.row_number()
+        .over(
+            partition_by=(TaskChange.user_id, TaskChange.task_id),
+            order_by=TaskChange.id.desc(),
+        )
+        .label("task_rank"),
+    ).subquery("ranked")
+    superseded = select(ranked.c.id).where(ranked.c.task_rank > 1)
+    result = await session.execute(
+        delete(TaskChange).where(TaskChange.id.in_(superseded))
+    )
+    pruned = result.rowcount
+
+    newer = aliased(TaskChange)
+    expired = (
+        delete(TaskChange)
+        .where(
+            TaskChange.action == "delete",
+            TaskChange.created_at < func.now() - retention,
+            TaskChange.id
+            < select(func.max(newer.id))
+            .where(newer.user_id == TaskChange.user_id)
+            .scalar_subquery(),
+        )
+        .returning(TaskChange.user_id, TaskChange.id)
+        .cte("expired")
+    )
+    watermarks = (
+        select(
+            expired.c.user_id,
+            func.max(expired.c.id).label("pruned_id"),
+            func.count().label("pruned"),
+        )
+        .group_by(expired.c.user_id)
+        .subquery("watermarks")
+    )
+    result = await session.execute(
+        update(User)
+        .where(User.id == watermarks.c.user_id)
+        .values(
+            changes_pruned_id=func.greatest(
+                User.changes_pruned_id, watermarks.c.pruned_id
+            )
+        )
+        .returning(watermarks.c.pruned)
+        .add_cte(expired)
+        .execution_options(synchronize_session=False)
+    )
+    return pruned + sum(result.scalars())
+
+
+async def prune_task_changes_periodically(interval: float, retention: timedelta):
+    """Фоновая очистка журнала раз в interval секунд."""
+    while True:
+        try:
+            async with db.session_factory() as session:
+                pruned = await prune_task_changes(session, retention)
+                await session.commit()
+            if pruned:
+                logger.info("Pruned %d task changes", pruned)
+        except Exception:
+            logger.exception("Task changes pruning failed")
+        await asyncio.sleep(interval)
@@ -1,3 +1,6 @@
+import asyncio
+from datetime import timedelta
+
 import uvicorn
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
@@ -5,24 +8,84 @@ from contextlib import asynccontextmanager
 from app.api.router_user import router as router_user
 from app.api.router_task import router as router_task
 from app.api.router_permission_task import router as router_task_permission
+from app.api.router_metrics import router as router_metrics
 from app.core.base.db_helper import db_helper
+from app.core.base.invalidation import invalidation_bus
+from app.core.base.timing import instrument_engine
+from app.core.config import settings
+from app.crud.crud_version import prune_task_changes_periodically
+from app.utils.compression import CompressionMiddleware
+from app.utils.func_by_auth import password_hasher
+from app.utils.profiler import ProfilerMiddleware
+from app.utils.prometheus import MetricsMiddleware, instrument, state_sync
+from app.utils.server_timing import ServerTimingMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    await invalidation_bus.start()
+    pruner = None
+    if settings.TASK_CHANGES_PRUNE_INTERVAL:
+        pruner = asyncio.create_task(
+            prune_task_changes_periodically(
+                settings.TASK_CHANGES_PRUNE_INTERVAL,
+                timedelta(days=settings.TASK_CHANGES_RETENTION_DAYS),
+            )
+        )
     yield
     # shutdown
+    if pruner is not None:
+        pruner.cancel()
+    await invalidation_bus.stop()
     print("dispose engine")
     await db_helper.dispose()
+    password_hasher.shutdown()
 
 
 main_app = FastAPI(lifespan=lifespan)
 
+if settings.COMPRESSION_ENCODINGS:
+    main_app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        encodings=tuple(settings.COMPRESSION_ENCODINGS),
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+if settings.PROFILE_TOKEN or settings.PROFILE_SAMPLE_RATE:
+    main_app.add_middleware(
+        ProfilerMiddleware,
+        directory=settings.PROFILE_DIR,
+        token=settings.PROFILE_TOKEN,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        interval=settings.PROFILE_INTERVAL,
+        max_files=settings.PROFILE_MAX_FILES,
+    )
+
+# Добавляется после сжатия, чтобы быть внешним и учитывать его время.
+if (
+    settings.SERVER_TIMING_HEADER
+    or settings.SERVER_TIMING_LOG
+    or settings.SQL_REPEAT_THRESHOLD
+):
+    instrument_engine(db_helper.engine)
+    main_app.add_middleware(
+        ServerTimingMiddleware,
+        header=settings.SERVER_TIMING_HEADER,
+        log=settings.SERVER_TIMING_LOG,
+        repeat_threshold=settings.SQL_REPEAT_THRESHOLD,
+    )
+
+if settings.METRICS_ENABLED:
+    instrument(db_helper.engine, password_hasher)
+    main_app.add_middleware(MetricsMiddleware, state_sync=state_sync)
 
 main_app.include_router(router_user)
 main_app.include_router(router_task)
 main_app.include_router(router_task_permission)
+main_app.include_router(router_metrics)
 
 
 if __name__ == "__main__":
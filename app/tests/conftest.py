@@ -9,10 +9,13 @@ from httpx import AsyncClient, ASGITransport
 from core.config import settings
 from app.core.base.base_model import Base
 from app.core.base.db_helper import db_helper as db
+from app.core.base.timing import timing_listeners
 from app.main import main_app as fastapi_app
 
 from app.core.models.model_user import User
 from app.core.models.model_task import Task, TaskPermission, PermissionType
+from app.utils.cache import caches
+from app.utils.func_by_auth import create_access_token
 
 
 @pytest.fixture(scope="session")
@@ -26,6 +29,9 @@ def event_loop():
 async def prepare_database():
     assert settings.MODE == "TEST"
 
+    for cache in caches.values():
+        cache.clear()
+
     async with db.engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
@@ -62,3 +68,20 @@ async def prepare_database():
 async def ac():
     async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture(scope="function")
+async def authenticated_ac():
+    token = create_access_token({"sub": "1"})
+    async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url="http://test",
+                           cookies={"access_token": token}) as ac:
+        yield ac
+
+
+@pytest.fixture(scope="function")
+def request_timings():
+    """Замеры (RequestTiming) всех HTTP-запросов теста по порядку."""
+    timings = []
+    timing_listeners.append(timings.append)
+    yield timings
+    timing_listeners.remove(timings.append)
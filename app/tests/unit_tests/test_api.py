@@ -1,6 +1,17 @@
+import json
+from datetime import date, timedelta
+
 import pytest
 from httpx import AsyncClient
 
+from sqlalchemy import select, text
+
+from app.core.base.db_helper import db_helper as db
+from app.core.models.model_task import Task, TaskChange
+from app.crud.crud_acl import Access, acl_cache, has_access
+from app.crud.crud_version import prune_task_changes
+from app.utils.func_by_auth import password_hasher
+
 
 @pytest.mark.asyncio
 async def test_register_user(ac: AsyncClient):
@@ -20,3 +31,394 @@ async def test_login_user(ac: AsyncClient):
                                  "hash_password": "string"
                              })
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_all_task_pagination(ac: AsyncClient):
+    response = await ac.get("/get_all_task", params={"limit": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert [task["id"] for task in page["items"]] == [1, 2, 3]
+    assert page["next_cursor"] == 3
+
+    response = await ac.get("/get_all_task",
+                            params={"after_id": page["next_cursor"], "limit": 3})
+    page = response.json()
+    assert [task["id"] for task in page["items"]] == [4]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_task_stream(ac: AsyncClient):
+    response = await ac.get("/get_all_task", params={"after_id": 1, "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_get_me_tasks_pagination(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/get_me_tasks", params={"limit": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert [task["id"] for task in page["items"]] == [1, 2, 3]
+    assert page["next_cursor"] == 3
+
+    response = await authenticated_ac.get("/get_me_tasks",
+                                          params={"after_id": 3, "limit": 3})
+    page = response.json()
+    assert [task["id"] for task in page["items"]] == [4]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_me_tasks_filters(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/get_me_tasks",
+                                          params={"name_prefix": "task_test4"})
+    assert [task["id"] for task in response.json()["items"]] == [4]
+
+    response = await authenticated_ac.get("/get_me_tasks",
+                                          params={"date_from": "2024-08-05"})
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_db_pool_status(ac: AsyncClient):
+    response = await ac.get("/db_pool_status")
+    assert response.status_code == 200
+    assert response.json()["pool_class"] == "NullPool"
+
+
+TASK_UPDATE = {
+    "name_task": "updated",
+    "description": "updated",
+    "date_from": "2024-08-06",
+    "date_to": "2024-08-07"
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("task_id,status_code", [(1, 200), (3, 400), (99, 404)])
+async def test_update_task(authenticated_ac: AsyncClient, task_id, status_code):
+    response = await authenticated_ac.patch(f"/update_task{task_id}", json=TASK_UPDATE)
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert response.json()["name_task"] == "updated"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["/get_me_tasks", "/get_all_task"])
+async def test_tasks_etag(authenticated_ac: AsyncClient, url):
+    response = await authenticated_ac.get(url)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = await authenticated_ac.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = await authenticated_ac.get(url, params={"limit": 1},
+                                          headers={"if-none-match": etag})
+    assert response.status_code == 200
+
+    await authenticated_ac.patch("/update_task2", json=TASK_UPDATE)
+    response = await authenticated_ac.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("task_id,status_code", [(1, 200), (3, 404), (99, 404)])
+async def test_delete_task(authenticated_ac: AsyncClient, task_id, status_code):
+    response = await authenticated_ac.delete(f"/delete_task{task_id}")
+    assert response.status_code == status_code
+
+
+@pytest.mark.asyncio
+async def test_add_and_remove_permission(authenticated_ac: AsyncClient):
+    params = {"user_id": 2, "required_permission": "update"}
+    response = await authenticated_ac.post("/tasks/1/permissions", params=params)
+    assert response.status_code == 200
+    assert response.json()["permission"] == "update"
+
+    response = await authenticated_ac.post("/tasks/1/permissions", params=params)
+    assert response.status_code == 404
+
+    response = await authenticated_ac.delete("/tasks/1/permissions/2",
+                                             params={"required_permission": "update"})
+    assert response.status_code == 200
+
+    response = await authenticated_ac.delete("/tasks/1/permissions/2",
+                                             params={"required_permission": "update"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_add_permission_not_owner(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.post("/tasks/3/permissions",
+                                           params={"user_id": 1, "required_permission": "read"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("task_id,detail", [
+    (3, "Пользователь не являеться создателем задачи"),
+    (99, "Задача не найдена"),
+])
+async def test_remove_permission_errors(authenticated_ac: AsyncClient, task_id, detail):
+    response = await authenticated_ac.delete(f"/tasks/{task_id}/permissions/1",
+                                             params={"required_permission": "read"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == detail
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_json(authenticated_ac: AsyncClient):
+    tasks = [TASK_UPDATE, {"name_task": "broken"}, TASK_UPDATE]
+    response = await authenticated_ac.post("/create_tasks", json=tasks)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["ids"] == [5, 6]
+    assert [error["index"] for error in result["errors"]] == [1]
+
+
+@pytest.mark.asyncio
+async def test_create_tasks_ndjson(authenticated_ac: AsyncClient):
+    body = "\n".join([json.dumps(TASK_UPDATE), "not json", json.dumps(TASK_UPDATE)])
+    response = await authenticated_ac.post("/create_tasks", content=body,
+                                           headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1]
+
+
+@pytest.mark.asyncio
+async def test_batch_grant_and_revoke_permissions(authenticated_ac: AsyncClient):
+    items = [
+        {"task_id": 1, "user_id": 2, "permission": "read"},
+        {"task_id": 1, "user_id": 2, "permission": "update"},
+        {"task_id": 2, "user_id": 2, "permission": "update"},
+    ]
+    response = await authenticated_ac.post("/tasks/permissions/grant", json={"items": items})
+    assert response.status_code == 200
+    granted = {(p["task_id"], p["permission"]) for p in response.json()}
+    assert granted == {(1, "update"), (2, "update")}
+
+    response = await authenticated_ac.post("/tasks/permissions/revoke", json={"items": items})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_grant_not_owner(authenticated_ac: AsyncClient):
+    items = [
+        {"task_id": 1, "user_id": 2, "permission": "update"},
+        {"task_id": 3, "user_id": 1, "permission": "update"},
+    ]
+    response = await authenticated_ac.post("/tasks/permissions/grant", json={"items": items})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_register_and_login_user(ac: AsyncClient):
+    credentials = {"email": "test3@example.com", "hash_password": "string"}
+    response = await ac.post("/register", json=credentials)
+    assert response.status_code == 200
+
+    response = await ac.post("/login", json=credentials)
+    assert response.status_code == 200
+    assert "access_token" in response.cookies
+
+    response = await ac.post("/login", json={**credentials, "hash_password": "wrong"})
+    assert response.status_code == 400
+
+    response = await ac.get("/password_hasher_status")
+    assert response.json()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_holds_no_connection(ac: AsyncClient, monkeypatch):
+    idle_in_transaction = []
+
+    def watch(method):
+        async def wrapper(*args):
+            async with db.session_factory() as session:
+                idle_in_transaction.append(await session.scalar(text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND state = 'idle in transaction'"
+                )))
+            return await method(*args)
+        return wrapper
+
+    monkeypatch.setattr(password_hasher, "hash", watch(password_hasher.hash))
+    monkeypatch.setattr(password_hasher, "verify", watch(password_hasher.verify))
+    credentials = {"email": "test4@example.com", "hash_password": "string"}
+    assert (await ac.post("/register", json=credentials)).status_code == 200
+    assert (await ac.post("/login", json=credentials)).status_code == 200
+    assert idle_in_transaction == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached(authenticated_ac: AsyncClient):
+    before = (await authenticated_ac.get("/cache_status")).json()["user"]
+    await authenticated_ac.get("/get_me_tasks")
+    await authenticated_ac.get("/get_me_tasks")
+    after = (await authenticated_ac.get("/cache_status")).json()["user"]
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_acl_cache_is_invalidated_on_task_delete(authenticated_ac: AsyncClient):
+    params = {"user_id": 2, "required_permission": "update"}
+    response = await authenticated_ac.post("/tasks/1/permissions", params=params)
+    assert response.status_code == 200
+
+    response = await authenticated_ac.delete("/delete_task1")
+    assert response.status_code == 200
+
+    response = await authenticated_ac.post("/tasks/1/permissions", params=params)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Задача не найдена"
+
+
+@pytest.mark.asyncio
+async def test_task_delete_drops_only_affected_acls(authenticated_ac: AsyncClient):
+    async def load_acls():
+        async with db.session_factory() as session:
+            for user_id in (1, 2):
+                await has_access(session, user_id, 1, Access.READ)
+
+    private_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    await load_acls()
+    await authenticated_ac.delete(f"/delete_task{private_id}")
+    assert acl_cache.get(1) is None
+    assert acl_cache.get(2) is not None
+
+    shared_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    params = {"user_id": 2, "required_permission": "update"}
+    await authenticated_ac.post(f"/tasks/{shared_id}/permissions", params=params)
+    await load_acls()
+    await authenticated_ac.delete(f"/delete_task{shared_id}")
+    assert acl_cache.get(1) is None
+    assert acl_cache.get(2) is None
+
+
+@pytest.mark.asyncio
+async def test_acl_cache_survives_task_create(authenticated_ac: AsyncClient):
+    params = {"user_id": 2, "required_permission": "update"}
+    assert (await authenticated_ac.post("/tasks/1/permissions", params=params)).status_code == 200
+    acl = acl_cache.get(1)
+    assert acl is not None
+
+    task_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    assert acl_cache.get(1) is acl
+    response = await authenticated_ac.post(f"/tasks/{task_id}/permissions", params=params)
+    assert response.status_code == 200
+
+
+async def changes_since(ac: AsyncClient, since: int) -> dict:
+    response = await ac.get("/tasks/changes", params={"since": since})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_tasks_changes(authenticated_ac: AsyncClient):
+    start = (await changes_since(authenticated_ac, 0))["cursor"]
+
+    response = await authenticated_ac.post("/create_task", json=TASK_UPDATE)
+    task_id = response.json()["id"]
+    await authenticated_ac.patch(f"/update_task{task_id}", json=TASK_UPDATE)
+    changes = await changes_since(authenticated_ac, start)
+    assert [task["id"] for task in changes["upserts"]] == [task_id]
+    assert changes["deleted"] == []
+    assert changes["has_more"] is False
+
+    cursor = changes["cursor"]
+    assert await changes_since(authenticated_ac, cursor) == {
+        "upserts": [], "deleted": [], "cursor": cursor, "has_more": False
+    }
+
+    await authenticated_ac.delete(f"/delete_task{task_id}")
+    assert (await changes_since(authenticated_ac, cursor))["deleted"] == [task_id]
+    changes = await changes_since(authenticated_ac, start)
+    assert changes["upserts"] == []
+    assert changes["deleted"] == [task_id]
+
+
+async def prune(retention: timedelta) -> list[tuple[int, str]]:
+    async with db.session_factory() as session:
+        await prune_task_changes(session, retention)
+        await session.commit()
+        rows = await session.execute(
+            select(TaskChange.task_id, TaskChange.action).where(TaskChange.user_id == 1).order_by(TaskChange.id)
+        )
+        return [tuple(row) for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_prune_task_changes(authenticated_ac: AsyncClient):
+    first_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    early = (await changes_since(authenticated_ac, 0))["cursor"]
+    deleted_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    await authenticated_ac.delete(f"/delete_task{deleted_id}")
+    task_id = (await authenticated_ac.post("/create_task", json=TASK_UPDATE)).json()["id"]
+    middle = (await changes_since(authenticated_ac, 0))["cursor"]
+    await authenticated_ac.patch(f"/update_task{task_id}", json=TASK_UPDATE)
+    await authenticated_ac.patch(f"/update_task{task_id}", json=TASK_UPDATE)
+    cursors = (0, early, middle)
+    before = [await changes_since(authenticated_ac, since) for since in cursors]
+    assert before[1]["deleted"] == [deleted_id]
+
+    # Вытесненные записи удаляются без изменения ответа для любого курсора.
+    assert await prune(timedelta(days=30)) == [
+        (first_id, "create"), (deleted_id, "delete"), (task_id, "update")
+    ]
+    assert [await changes_since(authenticated_ac, since) for since in cursors] == before
+
+    # Истекший tombstone удаляется, последняя запись пользователя остается.
+    assert await prune(timedelta(0)) == [(first_id, "create"), (task_id, "update")]
+    assert (await changes_since(authenticated_ac, 0))["deleted"] == []
+    assert await changes_since(authenticated_ac, middle) == before[2]
+    cursor = before[0]["cursor"]
+    assert (await changes_since(authenticated_ac, cursor))["cursor"] == cursor
+
+    # Курсор старше удаленного tombstone не получит удаление: нужна полная загрузка.
+    response = await authenticated_ac.get("/tasks/changes", params={"since": early})
+    assert response.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_search_tasks(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/tasks/search", params={"q": "string_test3"})
+    assert [task["id"] for task in response.json()["items"]] == [3]
+
+    for name, description in [("Сервер", "подготовить отчет"),
+                              ("Квартальные отчеты", "релиз"),
+                              ("Отпуск", "купить билеты")]:
+        await authenticated_ac.post("/create_task", json={**TASK_UPDATE, "name_task": name,
+                                                          "description": description})
+    response = await authenticated_ac.get("/tasks/search", params={"q": "отчёт"})
+    page = response.json()
+    assert [task["name_task"] for task in page["items"]] == ["Квартальные отчеты", "Сервер"]
+    assert page["next_cursor"] is None
+
+    response = await authenticated_ac.get("/tasks/search", params={"q": "отчет", "limit": 1})
+    assert response.json()["next_cursor"] == 1
+    response = await authenticated_ac.get("/tasks/search",
+                                          params={"q": "отчет", "limit": 1, "cursor": 1})
+    assert [task["name_task"] for task in response.json()["items"]] == ["Сервер"]
+
+
+@pytest.mark.asyncio
+async def test_search_respects_visibility(authenticated_ac: AsyncClient):
+    async with db.session_factory() as session:
+        session.add(Task(name_task="секретный отчет", description="", user_id=2,
+                         date_from=date(2024, 8, 4), date_to=date(2024, 8, 5)))
+        await session.commit()
+    response = await authenticated_ac.get("/tasks/search", params={"q": "отчет"})
+    assert response.json()["items"] == []
@@ -0,0 +1,65 @@
+import time
+
+from app.core.base.db_helper import db_helper as db
+from app.crud import crud_acl
+from app.crud.crud_acl import Access, acl_cache, has_access
+from app.utils.cache import TTLCache
+from app.utils.func_by_auth import create_access_token, decode_access_token, token_cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    cache = TTLCache("test_ttl", maxsize=10, ttl=5)
+    cache.set("key", "value")
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert cache.get("key") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_decode_access_token_is_cached():
+    token = create_access_token({"sub": "1"})
+    hits = token_cache.hits
+    assert decode_access_token(token)["sub"] == "1"
+    assert decode_access_token(token)["sub"] == "1"
+    assert token_cache.hits == hits + 1
+
+
+def test_ttl_cache_skips_stale_set():
+    cache = TTLCache("test_generation", maxsize=10, ttl=60)
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.set(1, "stale", generation=generation)
+    assert cache.get(1) is None
+
+    generation = cache.generation(1)
+    cache.invalidate_where(lambda key, value: False)
+    cache.set(1, "stale", generation=generation)
+    assert cache.get(1) is None
+
+    cache.set(1, "fresh", generation=cache.generation(1))
+    assert cache.get(1) == "fresh"
+
+
+async def test_acl_invalidated_during_load_is_not_cached(monkeypatch):
+    load_user_acl = crud_acl.load_user_acl
+
+    async def load_then_revoke(session, user_id):
+        acl = await load_user_acl(session, user_id)
+        crud_acl.drop_users_acl([user_id])
+        return acl
+
+    monkeypatch.setattr(crud_acl, "load_user_acl", load_then_revoke)
+    async with db.session_factory() as session:
+        assert await has_access(session, 2, 1, Access.READ)
+    assert acl_cache.get(2) is None
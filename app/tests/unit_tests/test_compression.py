@@ -0,0 +1,100 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.utils import compression
+from app.utils.compression import CompressionMiddleware, accepted_encodings
+
+BIG = "описание задачи " * 200
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+
+    @app.get("/big")
+    async def big():
+        return PlainTextResponse(BIG)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    async def chunks():
+        for number in range(3):
+            yield f"{number}\n".encode()
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+async def get(app: FastAPI, url: str, encoding: str):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(url, headers={"accept-encoding": encoding})
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, br;q=0, deflate;q=0.5") == {"gzip", "deflate"}
+    assert accepted_encodings("") == set()
+
+
+@pytest.mark.asyncio
+async def test_gzip_large_response():
+    response = await get(make_app(encodings=("gzip",)), "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BIG.encode())
+    assert response.text == BIG
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url,encoding", [
+    ("/small", "gzip"),
+    ("/big", "identity"),
+    ("/events", "gzip"),
+])
+async def test_not_compressed(url, encoding):
+    response = await get(make_app(), url, encoding)
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_are_flushed():
+    app = make_app(encodings=("gzip",))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream",
+             "query_string": b"", "root_path": "", "scheme": "http", "server": ("test", 80),
+             "headers": [(b"accept-encoding", b"gzip")]}
+    await app(scope, receive, send)
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    decompressor = zlib.decompressobj(31)
+    # Каждая часть распаковывается сразу, не дожидаясь конца потока.
+    assert [decompressor.decompress(body) for body in bodies[:3]] == [b"0\n", b"1\n", b"2\n"]
+    assert gzip.decompress(b"".join(bodies)) == b"0\n1\n2\n"
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(compression.brotli is None, reason="brotli не установлен")
+async def test_brotli_preferred():
+    response = await get(make_app(), "/big", "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == BIG
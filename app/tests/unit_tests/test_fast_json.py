@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.schemas.schemas_task import TaskRead
+from app.utils import fast_json
+
+ROW = {
+    "id": 1,
+    "name_task": "задача",
+    "description": "описание",
+    "date_from": date(2024, 8, 6),
+    "date_to": date(2024, 8, 7),
+    "user_id": 1
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_matches_pydantic(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    expected = TaskRead.model_validate(ROW).model_dump_json().encode()
+    assert fast_json.dumps(ROW) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url,params", [
+    ("/get_me_tasks", {}),
+    ("/get_all_task", {"limit": 2}),
+    ("/get_all_task", {"stream": True}),
+])
+async def test_fast_json_keeps_response(authenticated_ac: AsyncClient, monkeypatch,
+                                        url, params):
+    slow = await authenticated_ac.get(url, params=params)
+    monkeypatch.setattr(settings, "TASKS_FAST_JSON", True)
+    fast = await authenticated_ac.get(url, params=params)
+    assert fast.status_code == 200
+    assert fast.content == slow.content
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+    assert fast.headers.get("etag") == slow.headers.get("etag")
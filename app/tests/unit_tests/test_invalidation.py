@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+
+from app.core.base.db_helper import db_helper as db
+from app.core.base import invalidation
+from app.core.base.invalidation import InvalidationBus, invalidation_bus
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_postgres_bus_delivers_committed_events(monkeypatch):
+    monkeypatch.setattr(invalidation_bus, "backend", "postgres")
+    worker = InvalidationBus("postgres", invalidation_bus.channel)
+    received = []
+    worker.register("user", received.extend)
+    await worker.start()
+    try:
+        async with db.session_factory() as session:
+            async with session.begin():
+                invalidation_bus.publish(session, "user", [1])
+                await session.rollback()
+
+        async with db.session_factory() as session:
+            async with session.begin():
+                invalidation_bus.publish(session, "user", [2, 3])
+
+        await wait_for(lambda: received)
+        assert received == [2, 3]
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_postgres_bus_splits_large_transactions(monkeypatch):
+    # Один id на payload: 2000 pg_notify больше лимита 1664 столбцов SELECT.
+    monkeypatch.setattr(invalidation_bus, "backend", "postgres")
+    monkeypatch.setattr(invalidation, "NOTIFY_IDS_SIZE", 1)
+    worker = InvalidationBus("postgres", invalidation_bus.channel)
+    received = []
+    worker.register("user", received.extend)
+    await worker.start()
+    try:
+        async with db.session_factory() as session:
+            async with session.begin():
+                invalidation_bus.publish(session, "user", range(2000))
+
+        await wait_for(lambda: len(received) == 2000)
+        assert received == list(range(2000))
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_postgres_bus_start_gives_up(monkeypatch, caplog):
+    attempts = []
+
+    async def refuse(dsn):
+        attempts.append(dsn)
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(invalidation.asyncpg, "connect", refuse)
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_CONNECT_ATTEMPTS", 2)
+    worker = InvalidationBus("postgres", invalidation_bus.channel)
+    with pytest.raises(ConnectionRefusedError):
+        await worker.start()
+    assert len(attempts) == 2
+    assert "after 2 attempts" in caplog.records[-1].getMessage()
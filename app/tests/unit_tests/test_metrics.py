@@ -0,0 +1,62 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+
+STATUS_ENDPOINTS = ("/db_pool_status", "/password_hasher_status", "/cache_status", "/metrics")
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+async def test_request_metrics_by_route_template(authenticated_ac: AsyncClient):
+    labels = {"method": "PATCH", "route": "/update_task{task_id}", "status": "404"}
+    before = sample("http_requests_total", **labels)
+    for task_id in (100, 101):
+        await authenticated_ac.patch(f"/update_task{task_id}", json={
+            "name_task": "updated",
+            "description": "updated",
+            "date_from": "2024-08-06",
+            "date_to": "2024-08-07"
+        })
+    assert sample("http_requests_total", **labels) == before + 2
+    assert sample("http_request_duration_seconds_count",
+                  method="PATCH", route="/update_task{task_id}") >= 2
+    assert sample("http_requests_in_progress", method="PATCH") == 0
+
+
+async def test_unmatched_route(ac: AsyncClient):
+    before = sample("http_requests_total", method="GET", route="unmatched", status="404")
+    await ac.get("/no/such/path")
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") == before + 1
+
+
+async def test_metrics_endpoint(ac: AsyncClient):
+    await ac.post("/register", json={"email": "metrics@example.com", "hash_password": "string"})
+    await ac.post("/login", json={"email": "metrics@example.com", "hash_password": "string"})
+
+    response = await ac.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in response.text
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in response.text
+    assert 'cache_misses_total{cache="user"}' in response.text
+    assert "task_event_connections" in response.text
+
+
+async def test_metrics_token(ac: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+    for path in STATUS_ENDPOINTS:
+        assert (await ac.get(path)).status_code == 401
+        assert (await ac.get(path, headers={"Authorization": "Bearer wrong"})).status_code == 401
+        assert (await ac.get(path, headers={"Authorization": "Bearer secret"})).status_code == 200
+
+
+@pytest.mark.parametrize("token, status", [("", 404), ("secret", 401)])
+async def test_metrics_closed_in_prod(ac: AsyncClient, monkeypatch, token, status):
+    monkeypatch.setattr(settings, "MODE", "PROD")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", token)
+    for path in STATUS_ENDPOINTS:
+        assert (await ac.get(path)).status_code == status
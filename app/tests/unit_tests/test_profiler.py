@@ -0,0 +1,96 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.utils.profiler import ProfilerMiddleware, StackSampler, WAITING_FRAME
+
+
+def busy_loop(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_app(directory, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, directory=str(directory), interval=0.001, **options)
+
+    @app.get("/slow")
+    async def slow():
+        busy_loop(0.05)
+        await asyncio.sleep(0.05)
+        return PlainTextResponse("ok")
+
+    return app
+
+
+async def get(app: FastAPI, headers: dict | None = None):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/slow", headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_profile_by_token(tmp_path):
+    app = make_app(tmp_path, token="secret")
+    response = await get(app, {"x-profile-token": "secret"})
+    name = response.headers["x-profile-id"]
+    assert os.listdir(tmp_path) == [name]
+
+    samples = {}
+    with open(tmp_path / name, encoding="utf-8") as file:
+        for line in file:
+            stack, count = line.rsplit(" ", 1)
+            samples[stack] = int(count)
+    assert any("busy_loop" in stack.split(";")[-1] for stack in samples)
+    assert samples.get(WAITING_FRAME, 0) > 0
+
+
+@pytest.mark.asyncio
+async def test_no_profile_without_token(tmp_path):
+    app = make_app(tmp_path, token="secret")
+    for headers in (None, {"x-profile-token": "wrong"}):
+        response = await get(app, headers)
+        assert "x-profile-id" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_sample_rate_and_max_files(tmp_path):
+    app = make_app(tmp_path, sample_rate=1, max_files=2)
+    names = [(await get(app)).headers["x-profile-id"] for _ in range(3)]
+    assert sorted(os.listdir(tmp_path)) == sorted(names[1:])
+
+
+@pytest.mark.asyncio
+async def test_profile_does_not_block_event_loop(tmp_path, monkeypatch):
+    join = StackSampler.join
+
+    def slow_join(self):
+        time.sleep(0.2)
+        join(self)
+
+    monkeypatch.setattr(StackSampler, "join", slow_join)
+    gaps = []
+
+    async def ticker(stop: asyncio.Event):
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    app = make_app(tmp_path, token="secret")
+    stop = asyncio.Event()
+    task = asyncio.create_task(ticker(stop))
+    await asyncio.sleep(0)
+    response = await get(app, {"x-profile-token": "secret"})
+    stop.set()
+    await task
+    assert "x-profile-id" in response.headers
+    assert max(gaps[1:]) < 0.1
@@ -0,0 +1,65 @@
+import json
+import logging
+
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.core.base.db_helper import db_helper as db
+from app.core.base.timing import RequestTiming, measure, request_timing
+
+
+def parse_server_timing(header: str) -> dict:
+    metrics = {}
+    for item in header.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+async def test_server_timing_header(authenticated_ac: AsyncClient):
+    response = await authenticated_ac.get("/get_me_tasks")
+    assert response.status_code == 200
+    metrics = parse_server_timing(response.headers["server-timing"])
+    assert {"jwt", "user", "render", "db", "app", "total"} <= set(metrics)
+    assert metrics["db"]["desc"] != '"0 queries"'
+    parts = sum(float(metrics[name]["dur"]) for name in ("jwt", "user", "render", "db", "app"))
+    assert abs(parts - float(metrics["total"]["dur"])) < 0.1
+
+
+async def test_server_timing_log(authenticated_ac: AsyncClient, caplog):
+    with caplog.at_level(logging.INFO, logger="app.utils.server_timing"):
+        response = await authenticated_ac.patch("/update_task1", json={
+            "name_task": "updated",
+            "description": "updated",
+            "date_from": "2024-08-06",
+            "date_to": "2024-08-07"
+        })
+    assert response.status_code == 200
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["method"] == "PATCH"
+    assert record["route"] == "/update_task{task_id}"
+    assert record["status"] == 200
+    assert record["db_statements"] > 0
+    assert 0 < record["db_ms"] <= record["total_ms"]
+
+
+async def test_server_timing_stream(ac: AsyncClient):
+    response = await ac.get("/get_all_task", params={"after_id": 1, "stream": True})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+async def test_measure_outside_request():
+    with measure("jwt"):
+        async with db.session_factory() as session:
+            await session.execute(text("SELECT 1"))
+    assert request_timing.get() is None
+
+    timing = RequestTiming()
+    token = request_timing.set(timing)
+    try:
+        async with db.session_factory() as session:
+            await session.execute(text("SELECT 1"))
+    finally:
+        request_timing.reset(token)
+    assert timing.db_statements == 1
@@ -0,0 +1,96 @@
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.core.base.db_helper import db_helper as db
+from app.core.base.timing import TimedRoute
+from app.utils.server_timing import ServerTimingMiddleware
+
+TASK = {
+    "name_task": "updated",
+    "description": "updated",
+    "date_from": "2024-08-06",
+    "date_to": "2024-08-07"
+}
+
+# Бюджет SQL-запросов на маршрут: запрос, которому нужно больше, валит тест.
+# Кеши пустые, поэтому бюджет - это худший случай (холодный кеш).
+STATEMENT_BUDGETS = {
+    "GET /get_me_tasks": 3,
+    "GET /get_all_task": 2,
+    "GET /tasks/search": 2,
+    "GET /tasks/changes": 2,
+    "POST /create_task": 4,
+    "POST /create_tasks": 4,
+    "PATCH /update_task{task_id}": 4,
+    "DELETE /delete_task{task_id}": 4,
+    "POST /tasks/{task_id}/permissions": 5,
+    "DELETE /tasks/{task_id}/permissions/{user_id}": 4,
+    "POST /tasks/permissions/grant": 5,
+    "POST /tasks/permissions/revoke": 5,
+}
+
+REQUESTS = {
+    "GET /get_me_tasks": ("GET", "/get_me_tasks", {}),
+    "GET /get_all_task": ("GET", "/get_all_task", {}),
+    "GET /tasks/search": ("GET", "/tasks/search", {"params": {"q": "задача"}}),
+    "GET /tasks/changes": ("GET", "/tasks/changes", {}),
+    "POST /create_task": ("POST", "/create_task", {"json": TASK}),
+    "POST /create_tasks": ("POST", "/create_tasks", {"json": [TASK] * 5}),
+    "PATCH /update_task{task_id}": ("PATCH", "/update_task1", {"json": TASK}),
+    "DELETE /delete_task{task_id}": ("DELETE", "/delete_task1", {}),
+    "POST /tasks/{task_id}/permissions": (
+        "POST", "/tasks/1/permissions", {"params": {"user_id": 2, "required_permission": "update"}}
+    ),
+    "DELETE /tasks/{task_id}/permissions/{user_id}": (
+        "DELETE", "/tasks/1/permissions/2", {"params": {"required_permission": "read"}}
+    ),
+    "POST /tasks/permissions/grant": ("POST", "/tasks/permissions/grant", {"json": {"items": [
+        {"task_id": 1, "user_id": 2, "permission": "update"},
+        {"task_id": 2, "user_id": 2, "permission": "update"},
+    ]}}),
+    "POST /tasks/permissions/revoke": ("POST", "/tasks/permissions/revoke", {"json": {"items": [
+        {"task_id": 1, "user_id": 2, "permission": "read"},
+        {"task_id": 2, "user_id": 2, "permission": "read"},
+    ]}}),
+}
+
+
+@pytest.mark.parametrize("route", STATEMENT_BUDGETS)
+async def test_statement_budget(authenticated_ac: AsyncClient, request_timings, route):
+    method, url, options = REQUESTS[route]
+    response = await authenticated_ac.request(method, url, **options)
+    assert response.status_code == 200, response.text
+
+    timing = request_timings[-1]
+    assert f"{method} {timing.route}" == route
+    assert timing.db_statements <= STATEMENT_BUDGETS[route], timing.statements
+    assert not timing.repeated(2), "повторяющиеся запросы (N+1)"
+
+
+async def test_repeated_statements_logged(request_timings, caplog):
+    app = FastAPI()
+    app.router.route_class = TimedRoute
+    app.add_middleware(ServerTimingMiddleware, header=False, log=False, repeat_threshold=3)
+
+    @app.get("/tasks/{task_id}/n_plus_one")
+    async def n_plus_one(task_id: int):
+        async with db.session_factory() as session:
+            for number in range(3):
+                await session.execute(text("SELECT id FROM tasks WHERE id = :id"), {"id": number})
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="app.utils.server_timing"):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            await ac.get("/tasks/1/n_plus_one")
+
+    timing = request_timings[-1]
+    assert timing.db_statements == 3
+    assert timing.repeated(3) == {"SELECT id FROM tasks WHERE id = $1": 3}
+    record = json.loads(caplog.records[-1].getMessage().split(": ", 1)[1])
+    assert record["route"] == "/tasks/{task_id}/n_plus_one"
+    assert record["repeated"] == [{"statement": "SELECT id FROM tasks WHERE id = $1", "count": 3}]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.api.router_task import task_events_stream
+from app.core.base.db_helper import db_helper as db
+from app.core.base.invalidation import invalidation_bus
+from app.core.base.task_events import TaskEventHub, RESYNC, task_event_hub
+from app.core.models.model_task import TaskChange
+
+TASK = {
+    "name_task": "pushed",
+    "description": "pushed",
+    "date_from": "2024-08-06",
+    "date_to": "2024-08-07"
+}
+
+
+@pytest.mark.asyncio
+async def test_events_are_pushed_to_task_audience(authenticated_ac: AsyncClient):
+    with task_event_hub.subscribe(1) as owner, task_event_hub.subscribe(2) as other:
+        response = await authenticated_ac.post("/create_task", json=TASK)
+        task_id = response.json()["id"]
+        event = owner.get_nowait()
+        assert (event["action"], event["task_id"]) == ("create", task_id)
+        assert other.empty()
+
+        await authenticated_ac.post(f"/tasks/{task_id}/permissions",
+                                    params={"user_id": 2, "required_permission": "read"})
+        assert other.get_nowait()["action"] == "grant"
+
+        await authenticated_ac.patch(f"/update_task{task_id}", json=TASK)
+        assert owner.get_nowait()["action"] == "update"
+        assert other.get_nowait()["action"] == "update"
+
+
+@pytest.mark.asyncio
+async def test_update_grantee_gets_no_events(authenticated_ac: AsyncClient):
+    with task_event_hub.subscribe(2) as other:
+        response = await authenticated_ac.post("/create_task", json=TASK)
+        task_id = response.json()["id"]
+        await authenticated_ac.post(f"/tasks/{task_id}/permissions",
+                                    params={"user_id": 2, "required_permission": "update"})
+        await authenticated_ac.patch(f"/update_task{task_id}", json=TASK)
+        await authenticated_ac.delete(f"/delete_task{task_id}")
+        assert other.empty()
+
+    async with db.session_factory() as session:
+        actions = await session.scalars(
+            select(TaskChange.action).where(TaskChange.task_id == task_id).order_by(TaskChange.id)
+        )
+        assert list(actions) == ["create", "update", "delete"]
+
+
+@pytest.mark.asyncio
+async def test_delete_reaches_readers_only_on_success(authenticated_ac: AsyncClient):
+    async with db.session_factory() as session:
+        changes_before = await session.scalar(select(func.count()).select_from(TaskChange))
+    with task_event_hub.subscribe(1) as owner, task_event_hub.subscribe(2) as reader:
+        response = await authenticated_ac.delete("/delete_task3")
+        assert response.status_code == 404
+        response = await authenticated_ac.delete("/delete_task100")
+        assert response.status_code == 404
+        assert owner.empty() and reader.empty()
+        async with db.session_factory() as session:
+            changes = await session.scalar(select(func.count()).select_from(TaskChange))
+        assert changes == changes_before
+
+        response = await authenticated_ac.delete("/delete_task1")
+        assert response.status_code == 200
+        assert owner.get_nowait()["action"] == "delete"
+        event = reader.get_nowait()
+        assert (event["action"], event["task_id"]) == ("delete", 1)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_resync():
+    hub = TaskEventHub(queue_size=2)
+    with hub.subscribe(1) as queue:
+        hub.dispatch([(1, task_id, task_id, "update") for task_id in range(3)])
+        assert queue.get_nowait() == RESYNC
+        assert queue.empty()
+    assert hub.connections() == 0
+
+
+@pytest.mark.asyncio
+async def test_task_events_stream_format():
+    stream = task_events_stream(7)
+    assert await anext(stream) == b"retry: 3000\n\n"
+    task_event_hub.dispatch([(7, 5, 42, "delete")])
+    message = (await anext(stream)).decode()
+    assert message.startswith("event: delete\nid: 42\ndata: ")
+    assert json.loads(message.split("data: ")[1]) == {
+        "action": "delete", "task_id": 5, "cursor": 42
+    }
+    await stream.aclose()
+    assert task_event_hub.connections() == 0
+
+
+def test_notify_payloads_fit_limit():
+    changes = [(user_id, 100000, 1000000 + user_id, "revoke") for user_id in range(2000)]
+    payloads = invalidation_bus.payloads([("task_change", changes)])
+    assert len(payloads) > 1
+    assert all(len(payload) < 8000 for payload in payloads)
+    assert sum(len(json.loads(payload)["ids"]) for payload in payloads) == 2000
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Ограниченный LRU-кеш в памяти процесса с временем жизни записей.
+
+    При переполнении вытесняется запись, к которой дольше всего не обращались.
+    Кеш с maxsize = 0 отключен: ничего не хранит и всегда промахивается.
+    Все кеши регистрируются по имени в caches для вывода статистики.
+
+    Чтобы загрузка из БД, начатая до сброса записи, не вернула в кеш
+    устаревшее значение, у ключей есть поколение: invalidate увеличивает
+    поколение ключа, invalidate_where и clear - общее поколение кеша.
+    Загрузчик читает generation(key) до запроса в БД и передает его в set,
+    который ничего не сохраняет, если поколение успело смениться.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.epoch = 0
+        self.generations: dict[Hashable, int] = {}
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> tuple[int, int]:
+        return self.epoch, self.generations.get(key, 0)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: tuple[int, int] | None = None,
+    ):
+        if self.maxsize <= 0:
+            return
+        if generation is not None and generation != self.generation(key):
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self.data[key] = (time.monotonic() + ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self.data.pop(key, None)
+        if len(self.generations) >= self.maxsize:
+            # Поколения ключей не копятся без предела: смена общего поколения
+            # так же отменяет все незавершенные загрузки.
+            self.bump_epoch()
+        self.generations[key] = self.generations.get(key, 0) + 1
+
+    def bump_epoch(self):
+        self.epoch += 1
+        self.generations.clear()
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """Удаляет записи, для которых predicate(key, value) истинен."""
+        for key in [k for k, (_, v) in self.data.items() if predicate(k, v)]:
+            del self.data[key]
+        self.bump_epoch()
+
+    def clear(self):
+        self.data.clear()
+        self.bump_epoch()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
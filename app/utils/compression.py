@@ -0,0 +1,140 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# SSE не сжимается: события маленькие и должны уходить клиенту сразу.
+EXCLUDED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31: deflate в обертке gzip.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, body: bytes) -> bytes:
+        return self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, body: bytes = b"") -> bytes:
+        return self.compressor.compress(body) + self.compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, body: bytes) -> bytes:
+        return self.compressor.process(body) + self.compressor.flush()
+
+    def finish(self, body: bytes = b"") -> bytes:
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Кодировки из Accept-Encoding, кроме явно запрещенных q=0."""
+    accepted = set()
+    for item in header.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        if any(
+            param.replace(" ", "") in ("q=0", "q=0.0", "q=0.00") for param in params
+        ):
+            continue
+        if name:
+            accepted.add(name.lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов brotli или gzip по Accept-Encoding.
+
+    Обычные ответы сжимаются целиком, если тело не меньше minimum_size.
+    Потоковые ответы сжимаются по частям: каждая часть дожимается flush,
+    поэтому клиент получает данные по мере генерации, а не в конце.
+    brotli используется, только если пакет установлен и клиент его принимает.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: tuple[str, ...] = ("br", "gzip"),
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [
+            name for name in encodings if name == "gzip" or (name == "br" and brotli)
+        ]
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def encoder(self, scope: Scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        for name in self.encodings:
+            if name in accepted:
+                if name == "br":
+                    return BrotliEncoder(self.brotli_quality)
+                return GzipEncoder(self.gzip_level)
+        return None
+
+    def should_compress(
+        self, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if headers.get("content-type", "").startswith(EXCLUDED_MEDIA_TYPES):
+            return False
+        return more_body or len(body) >= self.minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoder = self.encoder(scope) if scope["type"] == "http" else None
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compress = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compress
+            if message["type"] == "http.response.start":
+                # Заголовки отправляются вместе с первой частью тела,
+                # когда известно, сжимать ли ответ.
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                compress = self.should_compress(headers, body, more_body)
+            if compress:
+                body = encoder.chunk(body) if more_body else encoder.finish(body)
+                message = {**message, "body": body}
+            if start is not None:
+                if compress:
+                    headers["Content-Encoding"] = encoder.name
+                    headers.add_vary_header("Accept-Encoding")
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,41 @@
+import hashlib
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, scope: str, version: int) -> str:
+    """
+    Слабый ETag списка задач.
+
+    Версия меняется при любой записи, влияющей на список, а хеш параметров
+    запроса различает страницы и фильтры одного и того же списка.
+    """
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha256(query.encode()).hexdigest()[:16]
+    return f'W/"{scope}-{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет If-None-Match: '*' или список тегов через запятую."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # Для If-None-Match используется слабое сравнение.
+    return "*" in tags or etag.removeprefix("W/") in (
+        tag.removeprefix("W/") for tag in tags
+    )
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def set_etag(response: Response, etag: str):
+    response.headers.update(etag_headers(etag))
@@ -0,0 +1,41 @@
+import json
+from collections.abc import Mapping
+from datetime import date
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+
+def to_builtin(value: Any) -> Any:
+    """Типы, которых нет в JSON: строки БД (RowMapping) и даты."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Сериализует ответ за один проход без валидации через схемы.
+
+    Строки БД и даты кодируются как есть, поэтому ключи ответа совпадают
+    с колонками выборки. Используется orjson, если он установлен, иначе json.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=to_builtin)
+    return json.dumps(
+        content, default=to_builtin, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """Ответ из строк БД в обход повторной валидации response_model."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,11 +1,19 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Callable
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.utils.cache import TTLCache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+token_cache = TTLCache("token", settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -21,6 +29,85 @@ def verify_password(plain_password, hashed_password) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def timed_call(func, *args):
+    """Вызов func с замером времени внутри воркера пула."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в отдельном пуле потоков или процессов.
+
+    Хеширование занимает сотни миллисекунд CPU и не должно блокировать
+    event loop. Размер пула ограничивает число одновременных вычислений,
+    остальные запросы ждут в очереди, глубина которой видна в stats().
+    listeners получают операцию (hash/verify), время вычисления в воркере
+    и время ожидания в очереди пула.
+    """
+
+    def __init__(self, workers: int, executor: str = "thread"):
+        self.workers = workers
+        self.executor_kind = executor
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=workers)
+            if executor == "process"
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        )
+        self.in_flight = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.listeners: list[Callable[[str, float, float], None]] = []
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.workers, 0)
+
+    async def run(self, operation: str, func, *args):
+        self.in_flight += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, duration = await loop.run_in_executor(
+                self.executor, timed_call, func, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+        wait = max(time.perf_counter() - start - duration, 0)
+        for listener in self.listeners:
+            listener(operation, duration, wait)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password, hashed_password) -> bool:
+        return await self.run(
+            "verify", verify_password, plain_password, hashed_password
+        )
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_EXECUTOR
+)
+
+
 def create_access_token(data: dict) -> str:
     """
     Создает JWT-токен.
@@ -33,3 +120,21 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, settings.ALGORITHM)
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Проверяет подпись JWT-токена и возвращает его claims.
+
+    Проверенные claims кешируются по SHA-256 токена не дольше, чем до
+    истечения exp, поэтому повторные запросы той же сессии не проверяют
+    подпись заново. Ошибки jwt.decode пробрасываются как есть.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
+        ttl = min(token_cache.ttl, payload.get("exp", 0) - time.time())
+        if ttl > 0:
+            token_cache.set(key, payload, ttl)
+    return payload
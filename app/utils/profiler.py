@@ -0,0 +1,149 @@
+import asyncio
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_HEADER = "x-profile-token"
+# Сэмпл, снятый пока задача запроса не выполнялась (ждала БД, сеть, пул).
+WAITING_FRAME = "[waiting]"
+
+
+def frame_label(code) -> str:
+    return f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Статистический профилировщик одной asyncio-задачи.
+
+    Отдельный поток раз в interval секунд снимает стек потока event loop
+    через sys._current_frames. Стек засчитывается запросу, только если в
+    этот момент loop выполняет его задачу, иначе сэмпл идет в [waiting].
+    Код из пулов потоков (bcrypt, синхронные зависимости) не попадает
+    в профиль. Пока loop занят CPU, поток профилировщика получает GIL
+    не чаще sys.getswitchinterval() (5 мс), интервал меньше этого
+    не повышает точность.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: dict[str, int] = {}
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="request-profiler", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        """Сигнал остановки без ожидания потока, join() - после него."""
+        self.stopped.set()
+
+    def join(self):
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        if asyncio.current_task(self.loop) is not self.task:
+            key = WAITING_FRAME
+        else:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+        self.samples[key] = self.samples.get(key, 0) + 1
+
+    def collapsed(self) -> str:
+        """Профиль в формате collapsed stacks (открывается в speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+
+def write_profile(directory: str, name: str, content: str, max_files: int):
+    """Пишет профиль и удаляет самые старые, если файлов больше max_files."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as file:
+        file.write(content)
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".txt")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[: max(len(profiles) - max_files, 0)]:
+        os.remove(entry.path)
+
+
+class ProfilerMiddleware:
+    """
+    Профилирование отдельных запросов по требованию.
+
+    Запрос профилируется, если заголовок X-Profile-Token совпадает с token
+    или с вероятностью sample_rate. Профиль охватывает весь запрос вместе
+    с get_current_user и пишется в directory, имя файла возвращается в
+    заголовке X-Profile-Id. В каталоге хранится не больше max_files
+    профилей, старые удаляются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        directory: str = "profiles",
+        token: str = "",
+        sample_rate: float = 0,
+        interval: float = 0.005,
+        max_files: int = 100,
+    ):
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_files = max_files
+
+    def should_profile(self, scope: Scope) -> bool:
+        if self.token:
+            header = Headers(scope=scope).get(PROFILE_HEADER)
+            if header and hmac.compare_digest(header.encode(), self.token.encode()):
+                return True
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        route = re.sub(r"[^\w-]", "_", scope["path"].strip("/")) or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{route}-{uuid.uuid4().hex[:8]}.txt"
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            # Ожидание потока и запись файла не блокируют event loop.
+            await asyncio.to_thread(self.save, sampler, name)
+
+    def save(self, sampler: StackSampler, name: str):
+        sampler.join()
+        write_profile(self.directory, name, sampler.collapsed(), self.max_files)
@@ -0,0 +1,206 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.base.db_helper import db_helper
+from app.core.base.task_events import TaskEventHub, task_event_hub
+from app.core.config import settings
+from app.utils.cache import caches
+from app.utils.func_by_auth import PasswordHasher
+
+# Неизвестные пути (404) сводятся в одну метку, чтобы не плодить ряды.
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP-запросы по маршруту и статусу.",
+    ["method", "route", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Время HTTP-запроса до отправки всего тела.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Размер пула соединений.", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Соединения, выданные из пула.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Соединения сверх pool_size.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Ожидание свободного соединения из пула.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Ожидания соединения, завершенные по pool_timeout."
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Время bcrypt в воркере пула.",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds",
+    "Ожидание свободного воркера bcrypt.",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+CACHE_HITS = Counter("cache_hits_total", "Попадания в кеш.", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Промахи кеша.", ["cache"])
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Вытеснения из кеша.", ["cache"])
+TASK_EVENT_CONNECTIONS = Gauge(
+    "task_event_connections",
+    "Открытые SSE-подписки на события задач.",
+    multiprocess_mode="livesum",
+)
+
+
+class StateSync:
+    """
+    Перенос состояния процесса (пул, кеши, SSE) в метрики.
+
+    Счетчики кешей и пула живут в обычных атрибутах объектов, в метрики
+    переносятся приращения с прошлой синхронизации. Синхронизация идет
+    не чаще interval секунд после запросов и при каждом /metrics, поэтому
+    в режиме multiprocess значения воркеров отстают не больше чем на
+    interval от последнего запроса.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        task_event_hub: TaskEventHub,
+        interval: float = 1.0,
+    ):
+        self.engine = engine
+        self.task_event_hub = task_event_hub
+        self.interval = interval
+        self.synced_at = 0.0
+        self.cache_counts: dict[str, tuple[int, int, int]] = {}
+
+    def maybe_sync(self):
+        if time.monotonic() - self.synced_at >= self.interval:
+            self.sync()
+
+    def sync(self):
+        self.synced_at = time.monotonic()
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            DB_POOL_SIZE.set(pool.size())
+            DB_POOL_CHECKED_OUT.set(pool.checkedout())
+            DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+        TASK_EVENT_CONNECTIONS.set(self.task_event_hub.connections())
+        for name, cache in caches.items():
+            hits, misses, evictions = self.cache_counts.get(name, (0, 0, 0))
+            CACHE_HITS.labels(name).inc(max(cache.hits - hits, 0))
+            CACHE_MISSES.labels(name).inc(max(cache.misses - misses, 0))
+            CACHE_EVICTIONS.labels(name).inc(max(cache.evictions - evictions, 0))
+            self.cache_counts[name] = (cache.hits, cache.misses, cache.evictions)
+
+
+def observe_pool_wait(wait: float, timed_out: bool):
+    DB_POOL_WAIT_SECONDS.observe(wait)
+    if timed_out:
+        DB_POOL_TIMEOUTS.inc()
+
+
+def observe_password_hash(operation: str, duration: float, wait: float):
+    PASSWORD_HASH_SECONDS.labels(operation).observe(duration)
+    PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(wait)
+
+
+def instrument(engine: AsyncEngine, hasher: PasswordHasher):
+    """Подписывает метрики на ожидание пула и bcrypt."""
+    wait_stats = getattr(engine.pool, "wait_stats", None)
+    if wait_stats is not None and observe_pool_wait not in wait_stats.listeners:
+        wait_stats.listeners.append(observe_pool_wait)
+    if observe_password_hash not in hasher.listeners:
+        hasher.listeners.append(observe_password_hash)
+
+
+state_sync = StateSync(db_helper.engine, task_event_hub, settings.METRICS_SYNC_INTERVAL)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Текст метрик для Prometheus.
+
+    Если задан PROMETHEUS_MULTIPROC_DIR (несколько воркеров gunicorn),
+    метрики собираются из файлов всех воркеров каталога.
+    """
+    state_sync.sync()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Метрики HTTP-запросов: число, время по шаблону маршрута и запросы в работе.
+
+    Шаблон маршрута берется из scope["route_path"], который заполняет
+    TimedRoute, поэтому /update_task1 и /update_task2 попадают в один ряд.
+    """
+
+    def __init__(self, app: ASGIApp, state_sync: StateSync | None = None):
+        self.app = app
+        self.state_sync = state_sync
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        start = time.perf_counter()
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            route = scope.get("route_path", UNMATCHED_ROUTE)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
+            if self.state_sync is not None:
+                self.state_sync.maybe_sync()
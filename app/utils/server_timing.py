@@ -0,0 +1,93 @@
+import json
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.base.timing import RequestTiming, request_timing, timing_listeners
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Разбивка времени запроса: заголовок Server-Timing и строка лога.
+
+    Заголовок собирается в момент отправки заголовков ответа, поэтому у
+    потоковых ответов в нем только время до первой части тела. Строка лога
+    пишется после отправки всего тела и содержит полное время запроса,
+    число SQL-запросов и обменов с БД и суммарное время в БД.
+    Запрос, выполненный repeat_threshold и более раз за один HTTP-запрос,
+    попадает в лог предупреждением как вероятный N+1 (0 отключает проверку).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        header: bool = True,
+        log: bool = True,
+        repeat_threshold: int = 0,
+    ):
+        self.app = app
+        self.header = header
+        self.log = log
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+        status = 500
+
+        async def send_timed(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing.started()
+                if self.header:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timing.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            request_timing.reset(token)
+            if self.log and logger.isEnabledFor(logging.INFO):
+                self.log_request(scope, status, timing)
+            if self.repeat_threshold:
+                self.check_repeated(scope, timing)
+            for listener in timing_listeners:
+                listener(timing)
+
+    def log_request(self, scope: Scope, status: int, timing: RequestTiming):
+        breakdown = timing.breakdown(time.perf_counter())
+        record = {
+            "method": scope["method"],
+            "route": timing.route or scope["path"],
+            "status": status,
+            "total_ms": round(breakdown.pop("total"), 2),
+            "db_ms": round(breakdown.pop("db"), 2),
+            "db_statements": timing.db_statements,
+            "db_round_trips": timing.round_trips,
+            "phases": {name: round(ms, 2) for name, ms in breakdown.items()},
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+    def check_repeated(self, scope: Scope, timing: RequestTiming):
+        repeated = timing.repeated(self.repeat_threshold)
+        if not repeated:
+            return
+        record = {
+            "method": scope["method"],
+            "route": timing.route or scope["path"],
+            "repeated": [
+                {"statement": statement[:200], "count": count}
+                for statement, count in repeated.items()
+            ],
+        }
+        logger.warning("possible N+1: %s", json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,97 @@
+"""
+Сравнение скорости создания задач: POST /create_task по одной
+и POST /create_tasks пачкой (JSON-массив и NDJSON).
+
+Запросы идут в приложение через ASGI-транспорт httpx, база берется из
+DB_URL настроек. Созданные задачи принадлежат пользователю
+bench-bulk@bench.local и удаляются после замера.
+
+    python -m benchmarks.bulk_create --single 500 --bulk 50000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+
+from app.core.base.db_helper import db_helper as db
+from app.core.models.model_task import Task
+from app.main import main_app
+from app.utils.func_by_auth import create_access_token
+from benchmarks.common import ensure_bench_user
+
+BENCH_EMAIL = "bench-bulk@bench.local"
+
+TASK = {
+    "name_task": "bulk benchmark task",
+    "description": "task created by benchmarks.bulk_create",
+    "date_from": "2024-08-04",
+    "date_to": "2024-08-05",
+}
+
+
+async def cleanup(user_id: int) -> None:
+    async with db.session_factory() as session:
+        await session.execute(delete(Task).where(Task.user_id == user_id))
+        await session.commit()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    user_id = await ensure_bench_user(BENCH_EMAIL)
+    cookies = {"access_token": create_access_token({"sub": str(user_id)})}
+    report = {}
+    async with AsyncClient(
+        transport=ASGITransport(app=main_app),
+        base_url="http://bench",
+        cookies=cookies,
+        timeout=None,
+    ) as ac:
+        start = time.perf_counter()
+        for _ in range(args.single):
+            response = await ac.post("/create_task", json=TASK)
+            response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        report["single"] = {"rows": args.single, "rows_per_sec": args.single / elapsed}
+
+        start = time.perf_counter()
+        response = await ac.post("/create_tasks", json=[TASK] * args.bulk)
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        report["bulk_json"] = {"rows": args.bulk, "rows_per_sec": args.bulk / elapsed}
+
+        body = "\n".join([json.dumps(TASK)] * args.bulk)
+        start = time.perf_counter()
+        response = await ac.post(
+            "/create_tasks",
+            content=body,
+            headers={"content-type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        report["bulk_ndjson"] = {"rows": args.bulk, "rows_per_sec": args.bulk / elapsed}
+
+    await cleanup(user_id)
+    await db.dispose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--single", type=int, default=500)
+    parser.add_argument("--bulk", type=int, default=50_000)
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    for mode, result in report.items():
+        print(f"{mode}: {result['rows']} rows, {result['rows_per_sec']:.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Общие помощники бенчмарков."""
+
+import random
+import statistics
+import subprocess
+
+from sqlalchemy import select
+
+from app.core.base.db_helper import db_helper as db
+from app.core.models.model_user import User
+
+
+# Словарь для текстов задач: частые слова встречаются чаще (распределение,
+# близкое к Ципфу), поэтому тексты сжимаются и ищутся как настоящие.
+WORDS = (
+    "задача проект отчет встреча клиент релиз сервер база данных проверить "
+    "исправить обновить подготовить обсудить согласовать документация тесты "
+    "review deploy backend frontend api migration index cache latency bug "
+    "feature sprint дедлайн команда пользователь права доступ список срок"
+).split()
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def task_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, WORD_WEIGHTS, k=words))
+
+
+def asyncpg_dsn() -> str:
+    """DSN базы из настроек для прямого соединения asyncpg (COPY, LISTEN)."""
+    url = db.engine.url.set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def git_revision() -> str | None:
+    """Текущий коммит, чтобы отчеты разных ревизий можно было сравнивать."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def ensure_bench_user(email: str, hash_password: str = "x") -> int:
+    """Возвращает id пользователя с email, создавая его при необходимости."""
+    async with db.session_factory() as session:
+        user = await session.scalar(select(User).where(User.email == email))
+        if user is None:
+            user = User(email=email, hash_password=hash_password)
+            session.add(user)
+        else:
+            user.hash_password = hash_password
+        await session.commit()
+        return user.id
+
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99 и максимум выборки в миллисекундах."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {
+            "count": len(samples),
+            "p50": value,
+            "p95": value,
+            "p99": value,
+            "max": value,
+        }
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": max(samples) * 1000,
+    }
@@ -0,0 +1,61 @@
+"""
+Сравнение двух отчетов benchmarks.workload, например до и после коммита.
+
+Для каждого эндпоинта выводится изменение пропускной способности
+и p50/p95/p99. Код возврата 1, если какой-либо перцентиль вырос больше
+чем на --threshold процентов, поэтому скрипт подходит для CI.
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+"""
+
+import argparse
+import json
+
+PERCENTILES = ("p50", "p95", "p99")
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(base: dict, head: dict, threshold: float) -> tuple[list[str], bool]:
+    lines = [
+        f"{base.get('revision')} -> {head.get('revision')}",
+        f"{'endpoint':40} {'rps':>8} " + " ".join(f"{p:>8}" for p in PERCENTILES),
+    ]
+    regressed = False
+    for endpoint in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        before, after = base["endpoints"].get(endpoint), head["endpoints"].get(endpoint)
+        if before is None or after is None:
+            lines.append(
+                f"{endpoint:40} {'только в ' + ('head' if before is None else 'base')}"
+            )
+            continue
+        rps = change(before["requests_per_sec"], after["requests_per_sec"])
+        cells = []
+        for name in PERCENTILES:
+            delta = change(before["latency_ms"][name], after["latency_ms"][name])
+            regressed |= delta > threshold
+            cells.append(f"{delta:+7.1f}%")
+        lines.append(f"{endpoint:40} {rps:+7.1f}% " + " ".join(cells))
+    return lines, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10)
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as file:
+        base = json.load(file)
+    with open(args.head, encoding="utf-8") as file:
+        head = json.load(file)
+    lines, regressed = compare(base, head, args.threshold)
+    print("\n".join(lines))
+    raise SystemExit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Компромисс CPU и трафика при сжатии ответов со списками задач.
+
+Страницы задач генерируются с описаниями из свободного текста (слова
+с распределением, близким к Ципфу) и сериализуются как в ответе API.
+Для каждого размера страницы и кодировки замеряются размер, время сжатия
+и оценка времени до последнего байта на каналах разной ширины:
+сжатие + передача. БД не нужна; brotli замеряется, если установлен.
+
+    python -m benchmarks.compression --rows 10 100 1000 10000
+"""
+
+import argparse
+import json
+import random
+import time
+import zlib
+from datetime import date, timedelta
+
+from app.utils.compression import brotli
+from app.utils.fast_json import dumps
+from benchmarks.common import task_text
+
+
+def make_page(rows: int, rng: random.Random) -> bytes:
+    start = date(2024, 1, 1)
+    items = []
+    for task_id in range(1, rows + 1):
+        length = rng.randint(8, 60)
+        date_from = start + timedelta(days=rng.randrange(365))
+        items.append(
+            {
+                "id": task_id,
+                "name_task": task_text(rng, 3),
+                "description": task_text(rng, length),
+                "date_from": date_from,
+                "date_to": date_from + timedelta(days=rng.randrange(30)),
+                "user_id": rng.randrange(1, 100_000),
+            }
+        )
+    return dumps({"items": items, "next_cursor": None})
+
+
+def encoders() -> dict:
+    result = {"identity": lambda body: body}
+    for level in (1, 6, 9):
+        result[f"gzip-{level}"] = lambda body, level=level: zlib.compress(
+            body, level, wbits=31
+        )
+    if brotli is not None:
+        for quality in (1, 5, 11):
+            result[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(
+                body, quality=quality
+            )
+    return result
+
+
+def measure(body: bytes, encode, bandwidths: list[float], repeat: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encoded = encode(body)
+    compress_ms = (time.perf_counter() - start) / repeat * 1000
+    return {
+        "bytes": len(encoded),
+        "ratio": len(body) / len(encoded),
+        "compress_ms": compress_ms,
+        "compress_mb_per_sec": len(body) / 1e6 / (compress_ms / 1000 or 1e-9),
+        "time_to_last_byte_ms": {
+            f"{mbit:g}mbit": compress_ms + len(encoded) * 8 / (mbit * 1e6) * 1000
+            for mbit in bandwidths
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument(
+        "--bandwidth", type=float, nargs="+", default=[1, 10, 100, 1000], help="Мбит/с"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {}
+    for rows in args.rows:
+        body = make_page(rows, rng)
+        report[rows] = {
+            name: measure(body, encode, args.bandwidth, args.repeat)
+            for name, encode in encoders().items()
+        }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Сравнение планов запросов до и после вторичных индексов и GIN-индекса поиска.
+
+Скрипт наполняет пустую базу синтетическими данными, удаляет вторичные
+индексы, снимает EXPLAIN (ANALYZE, BUFFERS) для горячих запросов, создает
+индексы заново и повторяет замеры. Результат сохраняется в JSON.
+
+Запуск на базе, мигрированной до head:
+
+    python -m benchmarks.explain_indexes --tasks 10000000 --output plans.json
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import settings
+from benchmarks.seed import seed_generated
+
+INDEXES = {
+    "ix_tasks_user_id_id": "CREATE INDEX ix_tasks_user_id_id ON tasks (user_id, id)",
+    "ix_tasks_date_from_date_to": (
+        "CREATE INDEX ix_tasks_date_from_date_to ON tasks (date_from, date_to)"
+    ),
+    "ix_taskpermissions_user_id_permission_task_id": (
+        "CREATE INDEX ix_taskpermissions_user_id_permission_task_id "
+        "ON taskpermissions (user_id, permission, task_id)"
+    ),
+    "ix_tasks_search_vector": (
+        "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)"
+    ),
+}
+
+# Повторяет search_tasks: совпадения в своих и доступных на чтение задачах.
+SEARCH_TASKS = """
+    SELECT tasks.id, tasks.name_task FROM tasks
+    JOIN (
+        SELECT tasks.id FROM tasks
+        WHERE tasks.user_id = :user_id
+          AND tasks.search_vector @@ websearch_to_tsquery('russian', :{term})
+        UNION
+        SELECT tasks.id FROM tasks
+        JOIN taskpermissions ON tasks.id = taskpermissions.task_id
+        WHERE taskpermissions.user_id = :user_id
+          AND taskpermissions.permission = 'READ'
+          AND tasks.search_vector @@ websearch_to_tsquery('russian', :{term})
+    ) AS found ON tasks.id = found.id
+    ORDER BY ts_rank_cd(tasks.search_vector,
+                        websearch_to_tsquery('russian', :{term})) DESC, tasks.id
+    LIMIT 101
+"""
+
+# Запросы повторяют SQL, который строят crud_task, crud_user и каскадное
+# удаление пользователя.
+QUERIES = {
+    "get_accessible_task": """
+        SELECT * FROM (
+            (SELECT tasks.* FROM tasks
+             WHERE tasks.user_id = :user_id AND tasks.id > 0
+             ORDER BY tasks.id LIMIT 101)
+            UNION
+            (SELECT tasks.* FROM tasks
+             JOIN taskpermissions ON tasks.id = taskpermissions.task_id
+             WHERE taskpermissions.user_id = :user_id
+               AND taskpermissions.permission = 'READ' AND tasks.id > 0
+             ORDER BY tasks.id LIMIT 101)
+        ) AS accessible ORDER BY accessible.id LIMIT 101
+    """,
+    # Условие UPDATE из update_task, без самого обновления.
+    "update_task_access": """
+        SELECT tasks.id FROM tasks
+        WHERE tasks.id = :task_id
+          AND (tasks.user_id = :user_id
+               OR EXISTS (SELECT 1 FROM taskpermissions
+                          WHERE taskpermissions.task_id = tasks.id
+                            AND taskpermissions.user_id = :user_id
+                            AND taskpermissions.permission = 'UPDATE'))
+    """,
+    "user_delete_cascade": "SELECT 1 FROM tasks WHERE tasks.user_id = :user_id",
+    "tasks_by_date_range": """
+        SELECT tasks.id FROM tasks
+        WHERE tasks.date_from >= :date_from AND tasks.date_to <= :date_to
+        ORDER BY tasks.id LIMIT 101
+    """,
+    # Слово из каждой задачи и слово из одной задачи.
+    "search_tasks_common_term": SEARCH_TASKS.format(term="common_term"),
+    "search_tasks_rare_term": SEARCH_TASKS.format(term="rare_term"),
+}
+
+
+async def explain_all(conn: AsyncConnection, params: dict) -> dict:
+    plans = {}
+    for name, sql in QUERIES.items():
+        result = await conn.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params
+        )
+        plan = result.scalar_one()[0]
+        plans[name] = {
+            "execution_ms": plan["Execution Time"],
+            "root_node": plan["Plan"]["Node Type"],
+            "plan": plan,
+        }
+    return plans
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(args.url or str(settings.DB_URL))
+    async with engine.begin() as conn:
+        tasks_count = (await conn.execute(text("SELECT count(*) FROM tasks"))).scalar()
+        if not tasks_count:
+            await seed_generated(conn, args.users, args.tasks, args.share_every)
+        params = (
+            (
+                await conn.execute(
+                    text(
+                        "SELECT tp.user_id, tp.task_id FROM taskpermissions AS tp "
+                        "WHERE tp.permission = 'UPDATE' ORDER BY tp.id LIMIT 1"
+                    )
+                )
+            )
+            .mappings()
+            .one()
+        )
+        params = {
+            **params,
+            "date_from": date(2024, 6, 1),
+            "date_to": date(2024, 6, 3),
+            "common_term": "task",
+            "rare_term": str(params["task_id"]),
+        }
+
+    async with engine.begin() as conn:
+        for name in INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        await conn.execute(text("ANALYZE tasks"))
+        await conn.execute(text("ANALYZE taskpermissions"))
+        before = await explain_all(conn, params)
+
+        for ddl in INDEXES.values():
+            await conn.execute(text(ddl))
+        await conn.execute(text("ANALYZE tasks"))
+        await conn.execute(text("ANALYZE taskpermissions"))
+        after = await explain_all(conn, params)
+    await engine.dispose()
+
+    return {
+        "params": {k: str(v) for k, v in params.items()},
+        "rows": {"tasks": tasks_count or args.tasks},
+        "queries": {
+            name: {"before": before[name], "after": after[name]} for name in QUERIES
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="URL базы, по умолчанию DB_URL из настроек")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    parser.add_argument("--share-every", type=int, default=3)
+    parser.add_argument("--output", default="explain_plans.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    for name, result in report["queries"].items():
+        print(
+            f"{name}: {result['before']['root_node']} "
+            f"{result['before']['execution_ms']:.2f} ms -> "
+            f"{result['after']['root_node']} {result['after']['execution_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
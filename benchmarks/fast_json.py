@@ -0,0 +1,92 @@
+"""
+Сериализация страницы задач: стандартный путь FastAPI (валидация через
+response_model TaskPage и JSONResponse) против FastJSONResponse напрямую
+из строк БД.
+
+Страница читается из БД один раз через get_tasks, дальше замеряется только
+сериализация: строк в секунду и байт, выделенных на один ответ (пик
+tracemalloc). База берется из DB_URL настроек и должна содержать задачи.
+
+    python -m benchmarks.fast_json --rows 10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.core.base.db_helper import db_helper as db
+from app.crud.crud_task import get_tasks
+from app.main import main_app
+from app.utils.fast_json import FastJSONResponse, orjson
+
+
+async def render_default(field, page) -> bytes:
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def render_fast(field, page) -> bytes:
+    return FastJSONResponse(page).body
+
+
+async def measure(render, field, page, repeat: int) -> dict:
+    rows = len(page["items"])
+    body = await render(field, page)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await render(field, page)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await render(field, page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows_per_sec": rows * repeat / elapsed,
+        "ms_per_response": elapsed / repeat * 1000,
+        "peak_bytes_per_response": peak,
+        "response_bytes": len(body),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    async with db.session_factory() as session:
+        page = await get_tasks(session, 0, args.rows)
+    await db.dispose()
+    route = next(
+        r for r in main_app.routes if getattr(r, "path", "") == "/get_all_task"
+    )
+    field = route.response_field
+
+    default_body = await render_default(field, page)
+    fast_body = await render_fast(field, page)
+    return {
+        "rows": len(page["items"]),
+        "encoder": "orjson" if orjson is not None else "json",
+        "same_output": json.loads(default_body) == json.loads(fast_body),
+        "default": await measure(render_default, field, page, args.repeat),
+        "fast": await measure(render_fast, field, page, args.repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Микробенчмарк проверки JWT с кешем проверенных claims и без него.
+
+Моделируется поток запросов от sessions активных сессий: сессии выбираются
+с распределением, близким к Ципфу (несколько активных вкладок дают большую
+часть трафика), а с вероятностью --new-session-rate запрос приходит
+с только что выданным токеном. БД не нужна.
+
+    python -m benchmarks.jwt_cache --sessions 1000 --requests 200000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from app.utils.func_by_auth import create_access_token, decode_access_token, token_cache
+
+
+def make_workload(args: argparse.Namespace) -> list[str]:
+    rng = random.Random(args.seed)
+    tokens = [create_access_token({"sub": str(i)}) for i in range(args.sessions)]
+    weights = [1 / (rank + 1) for rank in range(args.sessions)]
+    workload = []
+    for picked in rng.choices(tokens, weights=weights, k=args.requests):
+        if rng.random() < args.new_session_rate:
+            picked = create_access_token({"sub": str(rng.randrange(10**9))})
+        workload.append(picked)
+    return workload
+
+
+def measure(workload: list[str], maxsize: int) -> dict:
+    token_cache.clear()
+    token_cache.maxsize = maxsize
+    token_cache.hits = token_cache.misses = token_cache.evictions = 0
+    start = time.perf_counter()
+    for token in workload:
+        decode_access_token(token)
+    elapsed = time.perf_counter() - start
+    lookups = token_cache.hits + token_cache.misses
+    return {
+        "maxsize": maxsize,
+        "decodes_per_sec": len(workload) / elapsed,
+        "hit_rate": token_cache.hits / lookups if lookups else 0.0,
+        "evictions": token_cache.evictions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--new-session-rate", type=float, default=0.01)
+    parser.add_argument("--cache-size", type=int, default=token_cache.maxsize)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    workload = make_workload(args)
+    report = {
+        "sessions": args.sessions,
+        "requests": args.requests,
+        "new_session_rate": args.new_session_rate,
+        "cache_off": measure(workload, 0),
+        "cache_on": measure(workload, args.cache_size),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
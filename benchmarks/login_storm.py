@@ -0,0 +1,104 @@
+"""
+Задержка посторонних запросов во время шквала логинов.
+
+Сначала замеряется задержка GET /get_all_task без нагрузки, затем во время
+непрерывных POST /login с заданной параллельностью. В режиме --inline
+bcrypt выполняется прямо в event loop, как до выноса в пул, для сравнения.
+Запускать вне MODE=TEST: с NullPool не видно исчерпания пула соединений.
+
+    python -m benchmarks.login_storm --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import Executor, Future
+
+from httpx import ASGITransport, AsyncClient
+
+from app.main import main_app
+from app.utils.func_by_auth import get_password_hash, password_hasher
+from benchmarks.common import ensure_bench_user, percentiles
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+class InlineExecutor(Executor):
+    """Выполняет задачу синхронно в вызывающем потоке."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+async def probe(ac: AsyncClient, duration: float) -> list[float]:
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await ac.get("/get_all_task", params={"limit": 10})
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def login_worker(ac: AsyncClient, stop: asyncio.Event) -> int:
+    logins = 0
+    credentials = {"email": BENCH_EMAIL, "hash_password": BENCH_PASSWORD}
+    while not stop.is_set():
+        response = await ac.post("/login", json=credentials)
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+
+async def run(args: argparse.Namespace) -> dict:
+    await ensure_bench_user(BENCH_EMAIL, get_password_hash(BENCH_PASSWORD))
+    if args.inline:
+        password_hasher.executor = InlineExecutor()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=main_app), base_url="http://bench", timeout=None
+    ) as ac:
+        baseline = await probe(ac, args.duration)
+
+        stop = asyncio.Event()
+        workers = [
+            asyncio.create_task(login_worker(ac, stop)) for _ in range(args.concurrency)
+        ]
+        storm = await probe(ac, args.duration)
+        stop.set()
+        logins = sum(await asyncio.gather(*workers))
+
+    return {
+        "mode": "inline" if args.inline else password_hasher.executor_kind,
+        "workers": password_hasher.workers,
+        "concurrency": args.concurrency,
+        "logins_per_sec": logins / args.duration,
+        "baseline_ms": percentiles(baseline),
+        "storm_ms": percentiles(storm),
+        "hasher": password_hasher.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--inline", action="store_true")
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
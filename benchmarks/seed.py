@@ -0,0 +1,271 @@
+"""
+Наполнение базы синтетическими данными для бенчмарков.
+
+seed_generated генерирует данные на стороне сервера через generate_series:
+десятки миллионов задач вставляются без передачи строк по сети, но тексты
+однотипные. seed_copy генерирует реалистичные тексты и настраиваемый граф
+прав в Python и загружает их через COPY:
+
+    python -m benchmarks.seed --users 10000 --tasks 1000000 --graph teams --reset
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from datetime import date, timedelta
+from typing import Iterable, Iterator
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.utils.func_by_auth import get_password_hash
+from benchmarks.common import asyncpg_dsn, task_text
+
+BENCH_PASSWORD = "bench-password"
+
+SEED_USERS = text(
+    """
+    INSERT INTO users (email, hash_password)
+    SELECT 'bench' || g || '@bench.local', 'x'
+    FROM generate_series(1, :users) AS g
+    """
+)
+
+SEED_TASKS = text(
+    """
+    INSERT INTO tasks (name_task, description, date_from, date_to, user_id)
+    SELECT
+        'task ' || g,
+        'description of task ' || g,
+        date '2024-01-01' + (g % 365),
+        date '2024-01-01' + (g % 365) + (g % 30),
+        (SELECT min(id) FROM users) + (g % :users)
+    FROM generate_series(1, :tasks) AS g
+    """
+)
+
+SEED_PERMISSIONS = text(
+    """
+    INSERT INTO taskpermissions (task_id, user_id, permission)
+    SELECT
+        t.id,
+        (SELECT min(id) FROM users) + ((t.id::bigint * 7919) % :users)::int,
+        CASE WHEN t.id % 3 = 0 THEN 'UPDATE' ELSE 'READ' END::permissiontype
+    FROM tasks AS t
+    WHERE t.id % :share_every = 0
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+async def seed_generated(
+    conn: AsyncConnection, users: int, tasks: int, share_every: int
+) -> None:
+    """
+    Вставляет users пользователей, tasks задач и разрешения для каждой
+    share_every-й задачи.
+    """
+    await conn.execute(SEED_USERS, {"users": users})
+    await conn.execute(SEED_TASKS, {"users": users, "tasks": tasks})
+    await conn.execute(SEED_PERMISSIONS, {"users": users, "share_every": share_every})
+    for table in ("users", "tasks", "taskpermissions"):
+        await conn.execute(text(f"ANALYZE {table}"))
+
+
+GRAPHS = ("random", "teams", "hub")
+
+# Таблицы, которые очищает --reset; остальные данные ссылаются на них.
+SEED_TABLES = "taskchanges, taskpermissions, tasks, taskversionshards, users"
+
+SECONDARY_INDEXES = """
+    SELECT indexname, indexdef FROM pg_indexes
+    WHERE schemaname = current_schema()
+      AND tablename IN ('tasks', 'taskpermissions')
+      AND indexname NOT IN (SELECT conname FROM pg_constraint)
+"""
+
+BACKFILL_CHANGES = """
+    INSERT INTO taskchanges (task_id, user_id, action)
+    SELECT task_id, user_id, 'create' FROM (
+        SELECT id AS task_id, user_id FROM tasks
+        UNION
+        SELECT task_id, user_id FROM taskpermissions WHERE permission = 'READ'
+    ) AS audience
+    ORDER BY user_id, task_id
+"""
+
+
+class SharingGraph:
+    """
+    Кому владелец задачи выдает права.
+
+    random - любым пользователям; teams - только коллегам по команде
+    из team_size пользователей; hub - с распределением, близким к Ципфу:
+    немногие популярные пользователи получают большую часть прав.
+    """
+
+    def __init__(self, kind: str, users: int, team_size: int, rng: random.Random):
+        self.kind = kind
+        self.users = users
+        self.team_size = team_size
+        self.rng = rng
+        if kind == "hub":
+            self.cum_weights = list(
+                itertools.accumulate(1 / rank for rank in range(1, users + 1))
+            )
+
+    def candidate(self, owner: int) -> int:
+        if self.kind == "teams":
+            team_start = (owner - 1) // self.team_size * self.team_size + 1
+            team_end = min(team_start + self.team_size - 1, self.users)
+            return self.rng.randint(team_start, team_end)
+        if self.kind == "hub":
+            return self.rng.choices(
+                range(1, self.users + 1), cum_weights=self.cum_weights
+            )[0]
+        return self.rng.randint(1, self.users)
+
+    def recipients(self, owner: int, count: int) -> set[int]:
+        result = set()
+        # Ограничение попыток: в маленькой команде может не хватить коллег.
+        for _ in range(count * 4):
+            if len(result) == count:
+                break
+            user_id = self.candidate(owner)
+            if user_id != owner:
+                result.add(user_id)
+        return result
+
+
+def generate_tasks(args, rng: random.Random) -> Iterator[tuple]:
+    start = date(2024, 1, 1)
+    for task_id in range(1, args.tasks + 1):
+        owner = rng.randint(1, args.users)
+        date_from = start + timedelta(days=rng.randrange(365))
+        yield (
+            task_id,
+            task_text(rng, 3),
+            task_text(rng, rng.randint(5, 40)),
+            date_from,
+            date_from + timedelta(days=rng.randrange(30)),
+            owner,
+        )
+
+
+def generate_permissions(
+    tasks: list[tuple], graph: SharingGraph, args, rng: random.Random
+) -> Iterator[tuple]:
+    for task_id, *_, owner in tasks:
+        if rng.random() >= args.share_ratio:
+            continue
+        for user_id in graph.recipients(owner, rng.randint(1, args.max_shares)):
+            permission = "UPDATE" if rng.random() < args.update_ratio else "READ"
+            yield task_id, user_id, permission
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+async def seed_copy(args) -> dict:
+    """
+    Наполняет пустую базу через COPY: users пользователей, tasks задач
+    и граф прав.
+
+    Данные генерируются детерминированно из --seed, поэтому одинаковые
+    параметры дают одинаковую базу на разных машинах и коммитах. id задаются
+    явно (пользователи 1..users, задачи 1..tasks), последовательности
+    сдвигаются после загрузки, вторичные индексы пересоздаются после COPY.
+    Всем пользователям назначается пароль BENCH_PASSWORD, email -
+    user<id>@bench.example.com.
+    """
+    rng = random.Random(args.seed)
+    graph = SharingGraph(args.graph, args.users, args.team_size, rng)
+    hash_password = get_password_hash(BENCH_PASSWORD)
+    connection = await asyncpg.connect(asyncpg_dsn())
+    started = time.perf_counter()
+    counts = {"users": args.users, "tasks": args.tasks, "taskpermissions": 0}
+    try:
+        if args.reset:
+            await connection.execute(f"TRUNCATE {SEED_TABLES} RESTART IDENTITY CASCADE")
+        elif await connection.fetchval("SELECT EXISTS (SELECT 1 FROM users)"):
+            raise SystemExit("База не пуста, используйте --reset")
+
+        # Вторичные индексы строятся один раз после загрузки, а не на каждую
+        # строку: для GIN по search_vector это в разы быстрее.
+        indexes = await connection.fetch(SECONDARY_INDEXES)
+        for index in indexes:
+            await connection.execute(f"DROP INDEX {index['indexname']}")
+
+        await connection.copy_records_to_table(
+            "users",
+            records=(
+                (user_id, bench_email(user_id), hash_password)
+                for user_id in range(1, args.users + 1)
+            ),
+            columns=["id", "email", "hash_password"],
+        )
+        for tasks in chunked(generate_tasks(args, rng), args.chunk_size):
+            await connection.copy_records_to_table(
+                "tasks",
+                records=tasks,
+                columns=[
+                    "id",
+                    "name_task",
+                    "description",
+                    "date_from",
+                    "date_to",
+                    "user_id",
+                ],
+            )
+            permissions = list(generate_permissions(tasks, graph, args, rng))
+            await connection.copy_records_to_table(
+                "taskpermissions",
+                records=permissions,
+                columns=["task_id", "user_id", "permission"],
+            )
+            counts["taskpermissions"] += len(permissions)
+
+        for table in ("users", "tasks"):
+            await connection.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            )
+        for index in indexes:
+            await connection.execute(index["indexdef"])
+        await connection.execute(BACKFILL_CHANGES)
+        for table in ("users", "tasks", "taskpermissions", "taskchanges"):
+            await connection.execute(f"ANALYZE {table}")
+    finally:
+        await connection.close()
+    return {**counts, "seconds": time.perf_counter() - started}
+
+
+def bench_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example.com"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Наполнение базы через COPY")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--graph", choices=GRAPHS, default="teams")
+    parser.add_argument("--share-ratio", type=float, default=0.3)
+    parser.add_argument("--max-shares", type=int, default=3)
+    parser.add_argument("--update-ratio", type=float, default=0.3)
+    parser.add_argument("--team-size", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reset", action="store_true", help="Очистить таблицы")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(seed_copy(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Нагрузочный прогон API сценариями из смеси эндпоинтов.
+
+Виртуальные пользователи в замкнутом цикле выполняют операции выбранной
+смеси (--mix) от имени случайных пользователей базы, наполненной
+benchmarks.seed. Запросы идут в приложение через ASGI-транспорт httpx
+или, с --url, в запущенный uvicorn. Отчет в JSON: пропускная способность
+и p50/p95/p99 на эндпоинт, ревизия git и параметры прогона, чтобы
+сравнивать коммиты через benchmarks.compare.
+
+    python -m benchmarks.seed --users 10000 --tasks 1000000 --reset
+    python -m benchmarks.workload --mix read_heavy --concurrency 16 --duration 30
+    uvicorn app.main:main_app --workers 4 &
+    python -m benchmarks.workload --url http://127.0.0.1:8000 --output head.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from dataclasses import dataclass, field
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+
+from app.core.base.db_helper import db_helper as db
+from app.core.models.model_task import Task
+from app.main import main_app
+from app.utils.func_by_auth import create_access_token
+from benchmarks.common import WORDS, git_revision, percentiles, task_text
+from benchmarks.seed import bench_email
+
+
+@dataclass
+class BenchUser:
+    id: int
+    headers: dict[str, str]
+    task_ids: list[int]
+    etag: str | None = None
+    cursor: int = 0
+
+
+@dataclass
+class Stats:
+    samples: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    def add(self, endpoint: str, elapsed: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(elapsed)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+TASK_UPDATE = {"date_from": "2024-08-06", "date_to": "2024-08-07"}
+
+
+async def get_me_tasks(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    response = await ac.get(
+        "/get_me_tasks", params={"limit": 100}, headers=user.headers
+    )
+    return "GET /get_me_tasks", response.status_code == 200
+
+
+async def get_me_tasks_revalidate(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    """Опрос дашборда: повторный запрос с If-None-Match."""
+    headers = {**user.headers, "if-none-match": user.etag or ""}
+    response = await ac.get("/get_me_tasks", params={"limit": 100}, headers=headers)
+    user.etag = response.headers.get("etag", user.etag)
+    return "GET /get_me_tasks (If-None-Match)", response.status_code in (200, 304)
+
+
+async def tasks_changes(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    response = await ac.get(
+        "/tasks/changes", params={"since": user.cursor}, headers=user.headers
+    )
+    if response.status_code == 200:
+        user.cursor = response.json()["cursor"]
+    return "GET /tasks/changes", response.status_code == 200
+
+
+async def search(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    response = await ac.get(
+        "/tasks/search", params={"q": rng.choice(WORDS)}, headers=user.headers
+    )
+    return "GET /tasks/search", response.status_code == 200
+
+
+async def update_task(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    if not user.task_ids:
+        return None, True
+    task_id = rng.choice(user.task_ids)
+    body = {**TASK_UPDATE, "name_task": task_text(rng, 3)}
+    body["description"] = task_text(rng, rng.randint(5, 40))
+    response = await ac.patch(f"/update_task{task_id}", json=body, headers=user.headers)
+    return "PATCH /update_task{task_id}", response.status_code == 200
+
+
+async def grant_permission(ac: AsyncClient, user: BenchUser, rng: random.Random):
+    if not user.task_ids:
+        return None, True
+    task_id = rng.choice(user.task_ids)
+    grantee = rng.randint(max(1, user.id - 10), user.id + 10)
+    params = {"user_id": grantee, "required_permission": "read"}
+    response = await ac.post(
+        f"/tasks/{task_id}/permissions", params=params, headers=user.headers
+    )
+    # 404 - разрешение уже выдано или нет такого пользователя (оба случая
+    # приходят из grand_permission как PermissionAlreadyExists): для
+    # сценария это нормальный ответ.
+    return "POST /tasks/{task_id}/permissions", response.status_code in (200, 404)
+
+
+MIXES = {
+    "read_heavy": {
+        get_me_tasks: 60,
+        search: 15,
+        tasks_changes: 15,
+        update_task: 8,
+        grant_permission: 2,
+    },
+    "write_heavy": {
+        get_me_tasks: 30,
+        update_task: 50,
+        grant_permission: 20,
+    },
+    "dashboard": {
+        get_me_tasks_revalidate: 80,
+        tasks_changes: 15,
+        update_task: 5,
+    },
+}
+
+
+async def load_users(count: int, rng: random.Random) -> list[BenchUser]:
+    """Случайные владельцы задач из базы с токенами и id их задач."""
+    async with db.session_factory() as session:
+        max_user = await session.scalar(select(func.max(Task.user_id)))
+        if max_user is None:
+            raise SystemExit("В базе нет задач, запустите python -m benchmarks.seed")
+        ids = rng.sample(range(1, max_user + 1), min(count, max_user))
+        result = await session.execute(
+            select(Task.user_id, func.array_agg(Task.id))
+            .where(Task.user_id.in_(ids))
+            .group_by(Task.user_id)
+        )
+        task_ids = dict(result.all())
+    await db.dispose()
+    users = []
+    for user_id in ids:
+        token = create_access_token(
+            {"sub": str(user_id), "email": bench_email(user_id)}
+        )
+        headers = {"cookie": f"access_token={token}"}
+        users.append(BenchUser(user_id, headers, task_ids.get(user_id, [])))
+    return users
+
+
+async def virtual_user(
+    ac: AsyncClient,
+    users: list[BenchUser],
+    mix: dict,
+    stats: Stats,
+    deadline: float,
+    rng: random.Random,
+):
+    operations, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        user = rng.choice(users)
+        operation = rng.choices(operations, weights)[0]
+        start = time.perf_counter()
+        try:
+            endpoint, ok = await operation(ac, user, rng)
+        except Exception:
+            endpoint, ok = operation.__name__, False
+        if endpoint is not None:
+            stats.add(endpoint, time.perf_counter() - start, ok)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    users = await load_users(args.users, rng)
+    if args.url:
+        ac = AsyncClient(base_url=args.url, timeout=None)
+    else:
+        ac = AsyncClient(
+            transport=ASGITransport(app=main_app), base_url="http://bench", timeout=None
+        )
+    stats = Stats()
+    async with ac:
+        if args.warmup:
+            await asyncio.gather(
+                *[
+                    virtual_user(
+                        ac,
+                        users,
+                        MIXES[args.mix],
+                        Stats(),
+                        time.perf_counter() + args.warmup,
+                        random.Random(rng.random()),
+                    )
+                    for _ in range(args.concurrency)
+                ]
+            )
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[
+                virtual_user(
+                    ac,
+                    users,
+                    MIXES[args.mix],
+                    stats,
+                    started + args.duration,
+                    random.Random(rng.random()),
+                )
+                for _ in range(args.concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - started
+
+    endpoints = {
+        endpoint: {
+            "requests_per_sec": len(samples) / elapsed,
+            "errors": stats.errors.get(endpoint, 0),
+            "latency_ms": percentiles(samples),
+        }
+        for endpoint, samples in sorted(stats.samples.items())
+    }
+    all_samples = [sample for samples in stats.samples.values() for sample in samples]
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "target": args.url or "asgi",
+        "params": {
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "users": len(users),
+            "seed": args.seed,
+        },
+        "total": {
+            "requests_per_sec": len(all_samples) / elapsed,
+            "errors": sum(stats.errors.values()),
+            "latency_ms": percentiles(all_samples),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mix", choices=MIXES, default="read_heavy")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--users", type=int, default=1000, help="Сколько из базы")
+    parser.add_argument("--url", help="Адрес запущенного uvicorn вместо ASGI")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Путь для JSON-отчета")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+# Запуск нескольких воркеров с общими метриками Prometheus:
+# PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus gunicorn app.main:main_app
+bind = "0.0.0.0:8000"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+# Кеши пользователей, токенов и прав живут в памяти каждого воркера. С
+# бэкендом local отзыв прав в одном воркере не доходит до остальных,
+# поэтому при нескольких воркерах по умолчанию включается postgres.
+if workers > 1:
+    os.environ.setdefault("CACHE_INVALIDATION_BACKEND", "postgres")
+
+
+def on_starting(server):
+    backend = os.environ.get("CACHE_INVALIDATION_BACKEND", "local")
+    if server.cfg.workers > 1 and backend != "postgres":
+        raise RuntimeError(
+            f"CACHE_INVALIDATION_BACKEND={backend} не сбрасывает кеши других "
+            f"воркеров, при {server.cfg.workers} воркерах нужен postgres."
+        )
+    # Файлы метрик прошлого запуска искажают счетчики, каталог очищается.
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)